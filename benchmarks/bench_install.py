@@ -0,0 +1,403 @@
+"""Офлайн-бенчмарк конвейера установки (JavaManager + извлечение лаунчера).
+
+Поднимает локальное HTTP-зеркало с синтетическим архивом в форме JRE
+(тысячи мелких файлов и несколько крупных jar), замеряет каждую фазу
+и сохраняет результаты в JSON. При указании --baseline сравнивает медианы
+с эталоном и завершается с кодом 1, если какая-либо фаза стала медленнее порога.
+
+Только Linux/POSIX: поддельные javaw.exe — это shell-скрипты.
+
+Пример:
+    python benchmarks/bench_install.py --output bench.json
+    python benchmarks/bench_install.py --baseline bench.json --threshold 0.25
+"""
+import sys
+import os
+import argparse
+import hashlib
+import http.server
+import json
+import logging
+import platform
+import random
+import shutil
+import socketserver
+import statistics
+import tempfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+import prelauncher  # noqa: E402
+
+JRE_ROOT = "zulu8-bench-jre"
+ZIP_DATE = (2024, 1, 1, 0, 0, 0)  # Фиксированная дата — архив воспроизводим побайтно
+
+
+# --- Синтетические данные ---
+
+def build_jre_zip(path: Path, small_files: int, large_files: int, large_size_mb: int, seed: int) -> str:
+    """Строит детерминированный архив, похожий на JRE, и возвращает его SHA-256."""
+    rng = random.Random(seed)
+    words = [f"java.lang.Class{i}" for i in range(256)]
+
+    def add(zf: zipfile.ZipFile, name: str, data: bytes, method: int = zipfile.ZIP_DEFLATED):
+        info = zipfile.ZipInfo(f"{JRE_ROOT}/{name}", date_time=ZIP_DATE)
+        info.compress_type = method
+        info.external_attr = 0o644 << 16
+        zf.writestr(info, data)
+
+    with zipfile.ZipFile(path, "w") as zf:
+        add(zf, "bin/javaw.exe", b"MZ" + rng.randbytes(64 * 1024))
+        add(zf, "release", b'JAVA_VERSION="1.8.0_482"\n')
+
+        # Мелкие файлы: сжимаемый «текстовый» контент, как legal/, lib/*.properties и т.п.
+        for i in range(small_files):
+            size = rng.randint(512, 8 * 1024)
+            text = " ".join(rng.choice(words) for _ in range(size // 16)).encode()[:size]
+            add(zf, f"lib/res/{i // 100:03d}/file{i:05d}.properties", text)
+
+        # Крупные jar: уже сжатые данные, поэтому хранятся без повторного сжатия
+        for i in range(large_files):
+            name = "lib/ext/jfxrt.jar" if i == 0 else f"lib/big{i}.jar"
+            add(zf, name, rng.randbytes(large_size_mb * 1024 * 1024), zipfile.ZIP_STORED)
+
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def build_fake_java_tree(root: Path, count: int) -> int:
+    """Создаёт дерево установок Java для find_existing_javas. Возвращает число валидных.
+
+    javaw.exe здесь — shell-скрипт, поэтому бенчмарк запускается только в POSIX.
+    """
+    valid = 0
+    for i in range(count):
+        kind = i % 4
+        home = root / "Java" / f"jdk1.8.0_{100 + i}"
+        (home / "bin").mkdir(parents=True, exist_ok=True)
+
+        # 0 — JRE с FX, 1 — JDK с FX, 2 — без FX, 3 — неподходящая версия
+        version = "1.8.0_482" if kind != 3 else "11.0.2"
+        if kind == 0:
+            (home / "lib" / "ext").mkdir(parents=True, exist_ok=True)
+            (home / "lib" / "ext" / "jfxrt.jar").write_bytes(b"PK")
+        elif kind in (1, 3):
+            (home / "jre" / "lib" / "ext").mkdir(parents=True, exist_ok=True)
+            (home / "jre" / "lib" / "ext" / "jfxrt.jar").write_bytes(b"PK")
+        if kind in (0, 1):
+            valid += 1
+
+        javaw = home / "bin" / "javaw.exe"
+        javaw.write_text(f"#!/bin/sh\necho 'openjdk version \"{version}\"' >&2\n")
+        javaw.chmod(0o755)
+    return valid
+
+
+# --- Локальное зеркало ---
+
+class MirrorHandler(http.server.BaseHTTPRequestHandler):
+    """Отдаёт один файл с ограничением скорости, задержкой и (опционально) Range."""
+
+    server: "MirrorServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.send_response(200)
+        if self.server.range_support:
+            self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(len(self.server.payload)))
+        self.end_headers()
+
+    def do_GET(self):
+        srv = self.server
+        if srv.latency:
+            time.sleep(srv.latency)
+
+        size = len(srv.payload)
+        start, end = 0, size - 1
+        range_header = self.headers.get("Range")
+
+        if srv.range_support and range_header and range_header.startswith("bytes="):
+            first, _, last = range_header[6:].partition("-")
+            start = int(first) if first else 0
+            end = int(last) if last else size - 1
+            if start >= size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.end_headers()
+                return
+            end = min(end, size - 1)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+
+        if srv.range_support:
+            self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+
+        view = memoryview(srv.payload)[start:end + 1]
+        step = 64 * 1024
+        began = time.perf_counter()
+        sent = 0
+        try:
+            for offset in range(0, len(view), step):
+                block = view[offset:offset + step]
+                self.wfile.write(block)
+                sent += len(block)
+                if srv.bandwidth:
+                    # Держим среднюю скорость не выше заданной
+                    ahead = sent / srv.bandwidth - (time.perf_counter() - began)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class MirrorServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, payload: bytes, bandwidth: int, latency: float, range_support: bool):
+        super().__init__(("127.0.0.1", 0), MirrorHandler)
+        self.payload = payload
+        self.bandwidth = bandwidth
+        self.latency = latency
+        self.range_support = range_support
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/java.zip"
+
+
+# --- Замеры ---
+
+def measure(name: str, repeats: int, setup: Callable[[], None], body: Callable[[], Any],
+            check: Optional[Callable[[Any], bool]] = None) -> Dict[str, Any]:
+    """Запускает body() repeats раз (setup() вне замера) и возвращает статистику."""
+    samples: List[float] = []
+    for _ in range(repeats):
+        setup()
+        began = time.perf_counter()
+        result = body()
+        samples.append(time.perf_counter() - began)
+        if check and not check(result):
+            raise RuntimeError(f"Benchmark '{name}' produced an unexpected result: {result!r}")
+
+    stats = {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "mean": statistics.fmean(samples),
+        "samples": samples,
+    }
+    print(f"{name:<22} median {stats['median'] * 1000:9.1f} ms   min {stats['min'] * 1000:9.1f} ms")
+    return stats
+
+
+def run_benchmarks(args: argparse.Namespace, work: Path) -> Dict[str, Any]:
+    logger = logging.getLogger("PrelauncherBench")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    temp_dir = work / "tmp"
+    temp_dir.mkdir()
+    source_zip = work / "source.zip"
+
+    began = time.perf_counter()
+    sha = build_jre_zip(source_zip, args.small_files, args.large_files, args.large_size_mb, args.seed)
+    payload = source_zip.read_bytes()
+    print(f"Synthetic JRE: {len(payload) / 1024 / 1024:.1f} MB, sha256 {sha[:16]}..., "
+          f"built in {time.perf_counter() - began:.1f} s")
+
+    server = MirrorServer(payload, args.bandwidth * 1024 * 1024 if args.bandwidth else 0,
+                          args.latency / 1000.0, not args.no_range)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    program_files = work / "ProgramFiles"
+    install_path = program_files / "Java" / "PixelmonPRO_JRE8"
+
+    # Перенаправляем все пути и зеркала приложения в рабочую папку бенчмарка
+    prelauncher.PROGRAM_FILES = program_files
+    prelauncher.CONFIG["java"]["install_path"] = install_path
+    mirror = {"url": server.url, "sha256": sha}
+    if args.chunked:
+        chunk_size = prelauncher.ChunkVerifier.DEFAULT_CHUNK_SIZE
+        mirror["chunk_size"] = chunk_size
+        mirror["chunks"] = [hashlib.sha256(payload[i:i + chunk_size]).hexdigest()
+                            for i in range(0, len(payload), chunk_size)]
+    prelauncher.CONFIG["java"]["mirrors"] = [mirror]
+    os.environ["ProgramFiles(x86)"] = str(work / "ProgramFilesX86")
+
+    tracer = prelauncher.Tracer(enabled=args.trace is not None)
+    manager = prelauncher.JavaManager(logger, temp_dir, tracer)
+    temp_zip = temp_dir / "java.zip"
+    cancel = threading.Event()
+    results: Dict[str, Any] = {}
+
+    try:
+        results["preflight"] = measure(
+            "preflight", args.repeats, lambda: None, manager.preflight, lambda shortage: shortage is None)
+
+        def reset_download():
+            temp_zip.unlink(missing_ok=True)
+
+        results["download_java"] = measure(
+            "download_java", args.repeats, reset_download,
+            lambda: manager.download_java(lambda p: None, cancel), bool)
+        results["download_java"]["mb_per_s"] = len(payload) / 1024 / 1024 / results["download_java"]["median"]
+
+        shutil.copyfile(source_zip, temp_zip)
+        results["verify_checksum"] = measure(
+            "verify_checksum", args.repeats, lambda: None,
+            lambda: manager.verify_checksum(temp_zip, sha), bool)
+
+        def reset_install():
+            shutil.rmtree(install_path, ignore_errors=True)
+            if not temp_zip.exists():
+                shutil.copyfile(source_zip, temp_zip)
+
+        results["install_java"] = measure(
+            "install_java", args.repeats, reset_install,
+            lambda: manager.install_java(cancel, sha), bool)
+        results["install_java_legacy"] = measure(
+            "install_java_legacy", args.repeats, reset_install,
+            lambda: manager.install_java(cancel), bool)
+
+        shutil.rmtree(program_files, ignore_errors=True)
+        valid = build_fake_java_tree(program_files, args.java_candidates)
+        results["find_existing_javas"] = measure(
+            "find_existing_javas", args.repeats, lambda: None,
+            manager.find_existing_javas, lambda found: len(found) == valid)
+
+        results["extract_launcher"] = bench_extract_launcher(args, work, logger, tracer)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    if args.trace:
+        tracer.save(args.trace)
+        print(f"Trace written to {args.trace}")
+
+    return results
+
+
+def bench_extract_launcher(args: argparse.Namespace, work: Path, logger: logging.Logger,
+                           tracer: "prelauncher.Tracer") -> Dict[str, Any]:
+    """Замер extract_launcher в режиме собранного exe (sys.frozen + _MEIPASS)."""
+    bundle = work / "bundle"
+    bundle.mkdir()
+    jar = bundle / prelauncher.LAUNCHER_JAR
+    jar.write_bytes(random.Random(args.seed).randbytes(args.launcher_size_mb * 1024 * 1024))
+
+    # Конструктор приложения требует прав администратора и UI — он здесь не нужен
+    app = prelauncher.PrelauncherApp.__new__(prelauncher.PrelauncherApp)
+    app.logger = logger
+    app.tracer = tracer
+    app.app_dir = work / "appdata"
+    app.app_dir.mkdir()
+
+    saved = {name: getattr(sys, name) for name in ("frozen", "_MEIPASS") if hasattr(sys, name)}
+    sys.frozen, sys._MEIPASS = True, str(bundle)
+    try:
+        return measure("extract_launcher", args.repeats, lambda: None, app.extract_launcher,
+                       lambda target: target.exists())
+    finally:
+        for name in ("frozen", "_MEIPASS"):
+            if name in saved:
+                setattr(sys, name, saved[name])
+            else:
+                delattr(sys, name)
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Сравнивает медианы с эталоном и возвращает список регрессий."""
+    regressions = []
+    print(f"\n{'phase':<22} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, stats in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            print(f"{name:<22} {'-':>12} {stats['median'] * 1000:>10.1f}ms {'new':>9}")
+            continue
+        ratio = stats["median"] / base["median"] - 1
+        mark = ""
+        if ratio > threshold:
+            mark = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<22} {base['median'] * 1000:>10.1f}ms {stats['median'] * 1000:>10.1f}ms "
+              f"{ratio * 100:>+8.1f}%{mark}")
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline benchmark of the Pixelmon.PRO install pipeline.")
+    parser.add_argument("--repeats", type=int, default=5, help="runs per phase (median is reported)")
+    parser.add_argument("--small-files", type=int, default=3000, help="small files in the synthetic JRE")
+    parser.add_argument("--large-files", type=int, default=3, help="large jars in the synthetic JRE")
+    parser.add_argument("--large-size-mb", type=int, default=8, help="size of each large jar, MB")
+    parser.add_argument("--launcher-size-mb", type=int, default=16, help="size of the fake launcher JAR, MB")
+    parser.add_argument("--java-candidates", type=int, default=40, help="fake Java installations to scan")
+    parser.add_argument("--bandwidth", type=float, default=0, help="mirror bandwidth, MB/s (0 = unlimited)")
+    parser.add_argument("--latency", type=float, default=0, help="mirror latency before response, ms")
+    parser.add_argument("--no-range", action="store_true", help="mirror ignores Range requests")
+    parser.add_argument("--chunked", action="store_true", help="mirror entry carries per-block hashes")
+    parser.add_argument("--seed", type=int, default=8, help="seed for synthetic data")
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"), help="where to write results")
+    parser.add_argument("--baseline", type=Path, help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown vs baseline median (0.25 = +25%%)")
+    parser.add_argument("--trace", type=Path, help="also write a Chrome trace of all runs to this file")
+    parser.add_argument("--keep", action="store_true", help="keep the working directory")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if os.name != "posix":
+        print("The install benchmark runs on Linux only (fake javaw.exe files are shell scripts).")
+        return 2
+    params = {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "threshold", "trace", "keep")}
+
+    work = Path(tempfile.mkdtemp(prefix="prelauncher-bench-"))
+    try:
+        results = run_benchmarks(args, work)
+    finally:
+        if args.keep:
+            print(f"Working directory kept: {work}")
+        else:
+            shutil.rmtree(work, ignore_errors=True)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=4), encoding="utf-8")
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline.get("params") != params:
+            print("WARNING: baseline was recorded with different parameters, comparison may be meaningless.")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nFAILED: regression above {args.threshold * 100:.0f}% in: {', '.join(regressions)}")
+            return 1
+        print("\nOK: no regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
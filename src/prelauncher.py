@@ -6,16 +6,27 @@ import requests
 import threading
 import hashlib
 import json
+import socket
+import http.server
 import ctypes
 import shutil
 import logging
 import atexit
 import math
 import time
+import re
+import zlib
+import struct
+import base64
+import contextlib
+import functools
+import locale
 from pathlib import Path
-from typing import Optional, Callable, Dict, Any, List
+from typing import Optional, Callable, Dict, Any, List, Tuple
 
 import dearpygui.dearpygui as dpg
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
 from logging.handlers import RotatingFileHandler
 
 # --- КОНФИГУРАЦИЯ ---
@@ -33,6 +44,30 @@ CONFIG: Dict[str, Any] = {
             }
         ],
         "version": "1.8.0_", # Частичное совпадение для поддержки обеих версий: 482 и 452
+        "single_pass_install": True, # Проверка хеша и распаковка за одно чтение архива
+        "space_margin": 50 * 1024 * 1024, # Запас свободного места сверх оценки, байт
+    },
+    "manifest": {
+        "url": "https://client.pixelmon.pro/manifest.json",
+        "public_key": "", # Ed25519 (hex) для проверки подписи; пустой ключ отключает манифест
+        "ttl": 6 * 60 * 60, # Секунды, в течение которых кэш используется без запроса
+        "timeout": 3,
+    },
+    "lan_peers": {
+        "enabled": False, # Включается здесь или ключом "lan_peers": true в launcher_config.json
+        "port": 47821, # UDP-порт обнаружения
+        "discovery_timeout": 0.7, # Секунды ожидания ответов на широковещательный запрос
+        "max_peers": 3,
+        "linger": 300, # Секунды простоя раздачи, после которых процесс завершается
+    },
+    "mirror_stats": {
+        "half_life": 3 * 24 * 60 * 60, # Секунды, за которые вес старых неудач уменьшается вдвое
+        "expected_size": 45 * 1024 * 1024, # Размер архива для оценки времени загрузки
+    },
+    "launch": {
+        "ready_marker": None, # Регулярное выражение в выводе лаунчера, означающее готовность (кроме окна)
+        "ready_timeout": 60, # Секунды ожидания окна/маркера, после которых лаунчер считается запущенным
+        "metrics_limit": 200, # Сколько последних запусков хранить в launch_metrics.json
     },
     "max_retries": 3,
     "debug": False
@@ -40,9 +75,13 @@ CONFIG: Dict[str, Any] = {
 
 # Динамическое определение путей
 PROGRAM_FILES = Path(os.getenv('PROGRAMFILES', 'C:/Program Files'))
+APP_DIR = Path(os.getenv('APPDATA', 'C:/')) / 'PixelmonPRO'
 CONFIG['java']['install_path'] = PROGRAM_FILES / 'Java' / 'PixelmonPRO_JRE8'
 LAUNCHER_JAR = "PixelmonPRO.jar"
 
+# Флаг существует только в Windows-сборке Python (на других ОС — 0)
+CREATE_NO_WINDOW = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+
 
 class SystemUtils:
     """Утилиты для работы с файловой системой и ОС Windows."""
@@ -74,11 +113,59 @@ class SystemUtils:
             )
             sys.exit()
 
+    @staticmethod
+    def preallocate(f, size: int):
+        """Заранее резервирует место под файл, чтобы он лёг на диск без фрагментации."""
+        try:
+            if hasattr(os, 'posix_fallocate'):
+                os.posix_fallocate(f.fileno(), 0, size)
+            else:
+                f.truncate(size)  # В Windows SetEndOfFile сразу выделяет кластеры под файл
+        except OSError:
+            pass
+
+    @staticmethod
+    def save_report(text: str, path: Path) -> None:
+        """Сохраняет отчёт в файл; в консоль выводит, только если она есть (в оконной сборке stdout — None)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text + "\n", encoding='utf-8')
+        if sys.stdout is not None:
+            print(text)
+            print(f"Report saved to {path}")
+
+    @staticmethod
+    def existing_ancestor(path: Path) -> Path:
+        """Ближайшая существующая папка на пути (для определения тома ещё не созданной папки)."""
+        for candidate in (path, *path.parents):
+            if candidate.exists():
+                return candidate
+        return path
+
+    @staticmethod
+    def has_visible_window(pid: int) -> bool:
+        """Проверяет, показал ли процесс с данным PID видимое окно."""
+        try:
+            user32 = ctypes.windll.user32
+            found = []
+
+            @ctypes.WINFUNCTYPE(ctypes.c_bool, ctypes.c_void_p, ctypes.c_void_p)
+            def callback(hwnd, _):
+                window_pid = ctypes.c_ulong()
+                user32.GetWindowThreadProcessId(hwnd, ctypes.byref(window_pid))
+                if window_pid.value == pid and user32.IsWindowVisible(hwnd):
+                    found.append(hwnd)
+                    return False  # Нашли — прекращаем перебор
+                return True
+
+            user32.EnumWindows(callback, 0)
+            return bool(found)
+        except Exception:
+            return False
+
     @staticmethod
     def detect_language() -> str:
         """Определяет язык системы (fallback: 'en')."""
         try:
-            import locale
             lang = locale.getdefaultlocale()[0][:2].lower()
             if lang == 'ru':
                 return 'ru'
@@ -125,7 +212,8 @@ class Locale:
                 "rule_warning_title": "⚠️ Attention: Project Rules",
                 "rule_warning_text": "The official language of the project is Russian. Other languages can be used, but Russian is the priority for communication.\n\nNote: The administration reserves the right to issue punishments or warnings at its discretion for violating this rule.",
                 "understand_btn": "I understand and agree",
-                "dont_show_again": "Don't show this again"
+                "dont_show_again": "Don't show this again",
+                "not_enough_space": "Not enough disk space on {path}: {needed:.0f} MB required, {free:.0f} MB free."
             },
             "ru": {
                 "preparing": "Подготовка...",
@@ -154,7 +242,8 @@ class Locale:
                 "rule_warning_title": "⚠️ Внимание: Правила проекта",
                 "rule_warning_text": "Официальный язык проекта - Русский язык. На проекте также можно прибегать к использованию других языков, но в приоритете общения на проекте - Русский язык.\n\nДополнение: Администрация вправе выдать наказание / предупреждение на своё усмотрение за нарушение этого правила.",
                 "understand_btn": "Я понимаю и согласен",
-                "dont_show_again": "Больше не показывать"
+                "dont_show_again": "Больше не показывать",
+                "not_enough_space": "Недостаточно места на диске {path}: требуется {needed:.0f} МБ, свободно {free:.0f} МБ."
             },
             "uk": {
                 "preparing": "Підготовка...",
@@ -183,7 +272,8 @@ class Locale:
                 "rule_warning_title": "⚠️ Увага: Правила проєкту",
                 "rule_warning_text": "Офіційна мова проєкту - російська. На проєкті також можна використовувати інші мови, але пріоритетом спілкування є російська.\n\nДоповнення: Адміністрація має право видати покарання / попередження на свій розсуд за порушення цього правила.",
                 "understand_btn": "Я розумію та погоджуюсь",
-                "dont_show_again": "Більше не показувати"
+                "dont_show_again": "Більше не показувати",
+                "not_enough_space": "Недостатньо місця на диску {path}: потрібно {needed:.0f} МБ, вільно {free:.0f} МБ."
             }
         }
         
@@ -204,12 +294,907 @@ class Locale:
         return text.format(**kwargs) if kwargs else text
 
 
+class Tracer:
+    """Сбор вложенных временных интервалов в формате Chrome Trace (chrome://tracing, Perfetto)."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()  # Отсчёт времени — от старта приложения
+        self._pid = os.getpid()
+        self._threads: Dict[int, str] = {}
+
+    def _now(self) -> float:
+        return (time.perf_counter() - self._origin) * 1_000_000  # Микросекунды
+
+    def _emit(self, event: Dict[str, Any]):
+        thread = threading.current_thread()
+        event.update(pid=self._pid, tid=thread.ident)
+        with self._lock:
+            self._threads.setdefault(thread.ident, thread.name)
+            self.events.append(event)
+
+    @contextlib.contextmanager
+    def span(self, name: str, cat: str = "install", **args):
+        """Интервал с аргументами. Возвращаемый словарь можно дополнять внутри блока."""
+        if not self.enabled:
+            yield args
+            return
+        start = self._now()
+        try:
+            yield args
+        finally:
+            self._emit({"name": name, "cat": cat, "ph": "X", "ts": start,
+                        "dur": self._now() - start, "args": args})
+
+    def counter(self, name: str, **values: float):
+        """Значение счётчика (например, скорость загрузки) в текущий момент."""
+        if self.enabled:
+            self._emit({"name": name, "ph": "C", "ts": self._now(), "args": values})
+
+    def instant(self, name: str, **args):
+        """Мгновенное событие (отметка на временной шкале)."""
+        if self.enabled:
+            self._emit({"name": name, "ph": "i", "s": "p", "ts": self._now(), "args": args})
+
+    def save(self, path: Path):
+        """Записывает трассу в JSON, открываемый в chrome://tracing или ui.perfetto.dev."""
+        if not self.enabled:
+            return
+        with self._lock:
+            meta = [{"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": name}}
+                    for tid, name in self._threads.items()]
+            events = meta + list(self.events)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+class PeerRequestHandler(http.server.BaseHTTPRequestHandler):
+    """HTTP-раздача проверенных архивов Java соседям по сети (с поддержкой Range)."""
+
+    server: "PeerHTTPServer"
+
+    def log_message(self, format, *args):
+        self.server.peer_cache.logger.debug(f"Peer {self.client_address[0]}: {format % args}")
+
+    def do_GET(self):
+        peer_cache = self.server.peer_cache
+        archive = peer_cache.archive_for_url_path(self.path)
+        if archive is None:
+            self.send_error(404)
+            return
+
+        size = archive.stat().st_size
+        start, end = 0, size - 1
+        range_header = self.headers.get("Range", "")
+        if range_header.startswith("bytes="):
+            try:
+                first, _, last = range_header[6:].split(",")[0].strip().partition("-")
+                if first:
+                    start, end = int(first), min(int(last), size - 1) if last else size - 1
+                else:
+                    start = max(size - int(last), 0)  # Суффикс: последние N байт
+            except ValueError:
+                self.send_error(400)
+                return
+            if start > end or start >= size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+
+        peer_cache.transfer_started()
+        try:
+            with open(archive, "rb") as f:
+                f.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = f.read(min(remaining, 1024 * 256))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            peer_cache.transfer_finished()
+
+
+class PeerHTTPServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, peer_cache: "PeerCache"):
+        super().__init__(("", 0), PeerRequestHandler)
+        self.peer_cache = peer_cache
+
+
+class PeerCache:
+    """Обмен проверенным архивом Java между прелаунчерами в одной локальной сети.
+
+    Соседям не доверяем: скачанный у них архив проходит ту же проверку SHA-256,
+    что и архив с зеркала, поэтому подменённый файл просто отбрасывается.
+    """
+
+    MAGIC = "PixelmonPRO-peer/1"
+
+    def __init__(self, logger: logging.Logger, cache_dir: Path, tracer: Optional[Tracer] = None):
+        self.logger = logger
+        self.cache_dir = cache_dir
+        self.tracer = tracer or Tracer()
+        self.port: int = CONFIG['lan_peers']['port']
+        self._archives: Dict[str, Path] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._http: Optional[PeerHTTPServer] = None
+        self._udp: Optional[socket.socket] = None
+        self._active_transfers = 0
+        self._last_activity = time.monotonic()
+
+    def archive_path(self, sha256: str) -> Path:
+        return self.cache_dir / f"java-{sha256.lower()}.zip"
+
+    def archive_for_url_path(self, url_path: str) -> Optional[Path]:
+        with self._lock:
+            for sha, path in self._archives.items():
+                if url_path == f"/{path.name}":
+                    return path
+        return None
+
+    @property
+    def serving(self) -> bool:
+        return self._http is not None
+
+    def publish(self, archive: Path, sha256: str):
+        """Кладёт ПРОВЕРЕННЫЙ архив в кэш и начинает раздавать его соседям."""
+        target = self.archive_path(sha256)
+        try:
+            if archive.resolve() != target.resolve():
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                partial = target.with_suffix(".part")
+                shutil.copyfile(archive, partial)
+                os.replace(partial, target)
+            with self._lock:
+                self._archives[sha256.lower()] = target
+            self.start()
+        except Exception as e:
+            self.logger.warning(f"Failed to share Java archive with LAN peers: {e}")
+
+    def start(self):
+        """Запускает HTTP-раздачу и ответчик на UDP-обнаружение (однократно)."""
+        with self._lock:
+            if self._http is not None:
+                return
+            self._http = PeerHTTPServer(self)
+            threading.Thread(target=self._http.serve_forever, name="PeerHTTP", daemon=True).start()
+
+            try:
+                udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                udp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                udp.bind(("", self.port))
+                udp.settimeout(1.0)
+                self._udp = udp
+                threading.Thread(target=self._answer_discovery, name="PeerDiscovery", daemon=True).start()
+            except OSError as e:
+                self.logger.warning(f"LAN peer discovery port {self.port} unavailable: {e}")
+
+        self.logger.info(f"Sharing Java archive with LAN peers on port {self._http.server_address[1]}")
+
+    def _answer_discovery(self):
+        while not self._stop_event.is_set():
+            try:
+                data, addr = self._udp.recvfrom(4096)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            try:
+                request = json.loads(data.decode("utf-8"))
+                if request.get("magic") != self.MAGIC or request.get("type") != "discover":
+                    continue
+                with self._lock:
+                    have = [sha for sha in request.get("sha256", []) if str(sha).lower() in self._archives]
+                if have:
+                    reply = {"magic": self.MAGIC, "type": "have", "sha256": have,
+                             "port": self._http.server_address[1]}
+                    self._udp.sendto(json.dumps(reply).encode("utf-8"), addr)
+            except Exception as e:
+                self.logger.debug(f"Ignoring malformed peer discovery packet from {addr[0]}: {e}")
+
+    def discover(self, sha256_list: List[str]) -> List[Dict[str, Any]]:
+        """Ищет в сети соседей с нужным архивом. Возвращает записи в формате зеркал."""
+        settings = CONFIG['lan_peers']
+        request = json.dumps({"magic": self.MAGIC, "type": "discover",
+                              "sha256": [sha.lower() for sha in sha256_list]}).encode("utf-8")
+        wanted = {sha.lower() for sha in sha256_list}
+        found: List[Dict[str, Any]] = []
+        seen = set()
+
+        with self.tracer.span("peer_discovery") as span, \
+                socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            sock.bind(("", 0))
+            for target in ("<broadcast>", "127.0.0.1"):
+                try:
+                    sock.sendto(request, (target, self.port))
+                except OSError as e:
+                    self.logger.debug(f"Peer discovery to {target} failed: {e}")
+
+            deadline = time.monotonic() + settings['discovery_timeout']
+            while len(found) < settings['max_peers']:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                sock.settimeout(remaining)
+                try:
+                    data, addr = sock.recvfrom(4096)
+                    reply = json.loads(data.decode("utf-8"))
+                    if reply.get("magic") != self.MAGIC or reply.get("type") != "have":
+                        continue
+                    port = int(reply["port"])
+                except socket.timeout:
+                    break
+                except (OSError, ValueError, KeyError):
+                    continue
+
+                # Своя машина отвечает и на broadcast (с адреса в LAN), и на 127.0.0.1 — это один сосед
+                host = "127.0.0.1" if self._is_local_address(addr[0]) else addr[0]
+                for sha in reply.get("sha256", []):
+                    sha = str(sha).lower()
+                    if sha not in wanted:
+                        continue  # Нам нужен только закреплённый архив
+                    if (host, port, sha) in seen:
+                        continue
+                    seen.add((host, port, sha))
+                    found.append({"url": f"http://{host}:{port}/{self.archive_path(sha).name}",
+                                  "sha256": sha, "peer": True})
+            span['peers'] = len(found)
+
+        if found:
+            self.logger.info(f"Found {len(found)} LAN peer(s) with the Java archive.")
+        return found[:settings['max_peers']]
+
+    @staticmethod
+    def _is_local_address(host: str) -> bool:
+        """Адрес принадлежит этой машине, если к нему можно привязать сокет."""
+        if host.startswith("127."):
+            return True
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+                probe.bind((host, 0))
+            return True
+        except OSError:
+            return False
+
+    def transfer_started(self):
+        with self._lock:
+            self._active_transfers += 1
+            self._last_activity = time.monotonic()
+
+    def transfer_finished(self):
+        with self._lock:
+            self._active_transfers -= 1
+            self._last_activity = time.monotonic()
+
+    def linger(self, idle_timeout: float):
+        """Продолжает раздачу, пока соседи качают и с последней загрузки прошло меньше idle_timeout."""
+        if not self.serving:
+            return
+        self.logger.info("Serving Java archive to LAN peers until idle...")
+        with self._lock:
+            self._last_activity = time.monotonic()
+        while True:
+            with self._lock:
+                idle = self._active_transfers == 0 and time.monotonic() - self._last_activity >= idle_timeout
+            if idle:
+                break
+            time.sleep(1.0)
+
+    def stop(self):
+        self._stop_event.set()
+        if self._http is not None:
+            self._http.shutdown()
+            self._http.server_close()
+        if self._udp is not None:
+            self._udp.close()
+
+
+class ManifestClient:
+    """Загрузка подписанного манифеста артефактов с кэшированием по ETag.
+
+    Формат ответа: {"payload": "<JSON-строка>", "signature": "<base64 Ed25519 от payload>"}.
+    Payload: {"schema": 1, "java": {"version": ..., "mirrors": [{"url", "sha256", "size"}]},
+    "launcher": {"version": ..., "sha256": ..., "size": ...}}.
+    """
+
+    def __init__(self, logger: logging.Logger, cache_file: Path, tracer: Optional[Tracer] = None):
+        self.logger = logger
+        self.cache_file = cache_file
+        self.tracer = tracer or Tracer()
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Возвращает проверенный манифест (из кэша или сети) либо None для встроенного CONFIG."""
+        settings = CONFIG['manifest']
+        if not settings['url'] or not settings['public_key']:
+            return None
+
+        with self.tracer.span("manifest", url=settings['url']) as span:
+            cached = self._read_cache()
+            cached_manifest = self._parse(cached['body']) if cached else None
+
+            if cached_manifest is not None and time.time() - cached.get('fetched_at', 0) < settings['ttl']:
+                span['source'] = "cache"
+                return cached_manifest
+
+            headers = {}
+            if cached_manifest is not None and cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+
+            try:
+                r = requests.get(settings['url'], headers=headers, timeout=settings['timeout'])
+                if r.status_code == 304 and cached_manifest is not None:
+                    span['source'] = "not modified"
+                    cached['fetched_at'] = time.time()
+                    self._write_cache(cached)
+                    return cached_manifest
+
+                r.raise_for_status()
+                manifest = self._parse(r.text)
+                if manifest is None:
+                    raise ValueError("manifest signature or format is invalid")
+
+                span['source'] = "network"
+                self._write_cache({"etag": r.headers.get('ETag'), "fetched_at": time.time(), "body": r.text})
+                return manifest
+
+            except (requests.RequestException, ValueError) as e:
+                # Устаревший, но подписанный манифест лучше встроенного CONFIG
+                span['source'] = "stale cache" if cached_manifest is not None else "builtin"
+                self.logger.warning(f"Manifest update failed: {e}")
+                return cached_manifest
+
+    def _parse(self, body: str) -> Optional[Dict[str, Any]]:
+        """Проверяет подпись и возвращает payload манифеста."""
+        try:
+            envelope = json.loads(body)
+            payload: str = envelope['payload']
+            public_key = Ed25519PublicKey.from_public_bytes(bytes.fromhex(CONFIG['manifest']['public_key']))
+            public_key.verify(base64.b64decode(envelope['signature']), payload.encode('utf-8'))
+            manifest = json.loads(payload)
+            if not isinstance(manifest, dict):
+                raise ValueError("payload is not an object")
+            return manifest
+        except InvalidSignature:
+            self.logger.error("Manifest signature is invalid, ignoring it.")
+        except Exception as e:
+            self.logger.warning(f"Failed to parse manifest: {e}")
+        return None
+
+    def _read_cache(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            return cached if isinstance(cached, dict) and 'body' in cached else None
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _write_cache(self, cached: Dict[str, Any]):
+        try:
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(cached, f, ensure_ascii=False)
+        except OSError as e:
+            self.logger.warning(f"Failed to save manifest cache: {e}")
+
+
+class ChunkVerifier:
+    """Поблочная проверка архива по списку SHA-256 из записи зеркала ("chunk_size", "chunks").
+
+    Позволяет найти испорченные блоки прямо во время загрузки (или в недокачанном
+    файле) и перекачать только их. Итоговой проверкой остаётся SHA-256 всего файла.
+    """
+
+    DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, mirror: Dict[str, Any]):
+        self.chunk_size: int = int(mirror.get('chunk_size', self.DEFAULT_CHUNK_SIZE))
+        self.hashes: List[str] = [h.lower() for h in mirror['chunks']]
+        self.size: Optional[int] = None  # Известен после проверки последнего блока
+        self._hasher = hashlib.sha256()
+        self._filled = 0
+        self._index = 0
+        self.bad: List[int] = []
+
+    def check(self, index: int, data: bytes) -> bool:
+        if index >= len(self.hashes) or hashlib.sha256(data).hexdigest() != self.hashes[index]:
+            return False
+        if index == len(self.hashes) - 1:
+            self.size = index * self.chunk_size + len(data)
+        return True
+
+    def block_range(self, index: int) -> str:
+        start = index * self.chunk_size
+        return f"bytes={start}-{start + self.chunk_size - 1}"
+
+    def feed(self, data: bytes):
+        """Хеширует поступающие данные потока; испорченные блоки попадают в self.bad."""
+        view = memoryview(data)
+        while view:
+            take = min(len(view), self.chunk_size - self._filled)
+            self._hasher.update(view[:take])
+            self._filled += take
+            view = view[take:]
+            if self._filled == self.chunk_size:
+                self._close_block()
+
+    def finish(self) -> List[int]:
+        """Завершает поток и возвращает испорченные и недополученные блоки."""
+        if self._filled:
+            self._close_block()
+        self.bad.extend(range(self._index, len(self.hashes)))
+        return self.bad
+
+    def _close_block(self):
+        digest = self._hasher.hexdigest()
+        if self._index >= len(self.hashes):
+            pass  # Лишние данные за концом архива отрезает JavaManager._repair_chunks (по self.size)
+        elif digest != self.hashes[self._index]:
+            self.bad.append(self._index)
+        elif self._index == len(self.hashes) - 1:
+            self.size = self._index * self.chunk_size + self._filled
+        self._index += 1
+        self._hasher = hashlib.sha256()
+        self._filled = 0
+
+    def scan(self, path: Path) -> List[int]:
+        """Проверяет уже лежащий на диске (недокачанный или повреждённый) файл."""
+        self.bad, self._index = [], 0
+        self._hasher, self._filled = hashlib.sha256(), 0
+        with open(path, "rb") as f:
+            while block := f.read(self.chunk_size):
+                self.feed(block)
+        return self.finish()
+
+
+class MirrorStats:
+    """Сохраняемая между запусками статистика зеркал: порядок перебора и параметры загрузки.
+
+    Для каждого URL хранятся скользящие средние TTFB и скорости, а также счётчики
+    успехов, сбоев и несовпадений хеша, которые со временем затухают (half_life).
+    """
+
+    DEFAULT_CHUNK_SIZE = 1024 * 512
+    DEFAULT_TIMEOUT = 10
+
+    def __init__(self, logger: logging.Logger, stats_file: Path):
+        self.logger = logger
+        self.stats_file = stats_file
+        self.mirrors: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(stats_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self.mirrors = {url: entry for url, entry in data.items() if isinstance(entry, dict)}
+        except (OSError, json.JSONDecodeError):
+            pass
+
+    def _decayed(self, url: str) -> Dict[str, Any]:
+        """Копия записи зеркала с затуханием счётчиков на текущий момент."""
+        entry = dict(self.mirrors.get(url, {}))
+        now = time.time()
+        decay = 0.5 ** (max(now - entry.get('updated', now), 0) / CONFIG['mirror_stats']['half_life'])
+        for key in ("successes", "failures", "mismatches"):
+            entry[key] = entry.get(key, 0.0) * decay
+        entry['updated'] = now
+        return entry
+
+    def record(self, url: str, ttfb: Optional[float] = None, throughput: Optional[float] = None,
+               failure: bool = False, mismatch: bool = False):
+        """Учитывает результат попытки загрузки (ttfb в секундах, throughput в байт/с)."""
+        entry = self.mirrors[url] = self._decayed(url)
+        if failure:
+            entry['failures'] += 1
+        elif mismatch:
+            entry['mismatches'] += 1
+        else:
+            entry['successes'] += 1
+        # Скользящие средние: новое значение весит 30%
+        for key, value in (("ttfb", ttfb), ("throughput", throughput)):
+            if value:
+                entry[key] = value if key not in entry else entry[key] * 0.7 + value * 0.3
+
+    def score(self, url: str) -> float:
+        """Ожидаемое время загрузки архива в секундах с поправкой на ненадёжность (меньше — лучше)."""
+        entry = self._decayed(url)
+        if entry.get('throughput'):
+            seconds = entry.get('ttfb', 0) + CONFIG['mirror_stats']['expected_size'] / entry['throughput']
+        else:
+            seconds = 60.0  # Неизвестное зеркало: нейтральная оценка
+        attempts = entry['successes'] + entry['failures'] + entry['mismatches']
+        failure_rate = (entry['failures'] + entry['mismatches']) / (attempts + 1)
+        return seconds * (1 + 4 * failure_rate) + 120 * entry['mismatches']
+
+    def order(self, mirrors: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Сортирует зеркала по оценке; при равенстве сохраняется порядок из CONFIG."""
+        return sorted(mirrors, key=lambda mirror: self.score(mirror['url']))
+
+    def tuning(self, url: str) -> Tuple[int, int]:
+        """Размер чанка и таймаут для следующей загрузки с этого зеркала."""
+        entry = self.mirrors.get(url, {})
+        chunk_size, timeout = self.DEFAULT_CHUNK_SIZE, self.DEFAULT_TIMEOUT
+        if entry.get('throughput'):
+            # Около 4 обновлений прогресса в секунду при известной скорости
+            chunk_size = int(min(max(entry['throughput'] / 4, 64 * 1024), 4 * 1024 * 1024))
+        if entry.get('ttfb'):
+            timeout = int(min(max(entry['ttfb'] * 5 + 5, 5), 30))
+        return chunk_size, timeout
+
+    def save(self):
+        try:
+            self.stats_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.stats_file, 'w', encoding='utf-8') as f:
+                json.dump(self.mirrors, f, indent=4)
+        except OSError as e:
+            self.logger.warning(f"Failed to save mirror stats: {e}")
+
+    def report(self) -> str:
+        """Текстовый отчёт для поддержки (--mirror-stats)."""
+        if not self.mirrors:
+            return "No mirror statistics recorded yet."
+        lines = []
+        for url in sorted(self.mirrors, key=self.score):
+            entry = self._decayed(url)
+            chunk_size, timeout = self.tuning(url)
+            ttfb = f"{entry['ttfb'] * 1000:.0f} ms" if entry.get('ttfb') else "-"
+            speed = f"{entry['throughput'] / 1024 / 1024:.2f} MB/s" if entry.get('throughput') else "-"
+            lines.append(
+                f"{url}\n"
+                f"    score {self.score(url):.1f} s, TTFB {ttfb}, throughput {speed}\n"
+                f"    successes {entry['successes']:.1f}, failures {entry['failures']:.1f}, "
+                f"checksum mismatches {entry['mismatches']:.1f} (decayed)\n"
+                f"    next run: chunk {chunk_size // 1024} KB, timeout {timeout} s"
+            )
+        return "\n".join(lines)
+
+
+class LaunchSupervisor:
+    """Запуск лаунчера с наблюдением: вывод JVM в лог, время до готовности, ранние падения.
+
+    Метрики каждого запуска сохраняются в launch_metrics.json, чтобы сравнивать разные JRE.
+    """
+
+    def __init__(self, logger: logging.Logger, metrics_file: Path, tracer: Optional[Tracer] = None):
+        self.logger = logger
+        self.metrics_file = metrics_file
+        self.tracer = tracer or Tracer()
+
+    def launch(self, java_exe: Path, launcher_jar: Path, cancel_event: threading.Event) -> Dict[str, Any]:
+        """Запускает лаунчер и ждёт его окна/маркера либо завершения процесса.
+
+        Возвращает метрику запуска; outcome: "ready", "timeout", "exited" (код 0),
+        "crashed" (ненулевой код до готовности) или "cancelled".
+        """
+        settings = CONFIG['launch']
+        metric: Dict[str, Any] = {"java": str(java_exe), "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        marker = re.compile(settings['ready_marker']) if settings['ready_marker'] else None
+        marker_seen = threading.Event()
+
+        with self.tracer.span("launch_attempt", java=str(java_exe)) as span:
+            started = time.perf_counter()
+            # Запускаем Java с указанием cwd (рабочей папки), чтобы лаунчер видел свои конфиги.
+            # В канал Java 8 пишет в кодировке ANSI (file.encoding, например Cp1251) — её же
+            # возвращает getpreferredencoding; -Dfile.encoding не задаём, чтобы не менять
+            # кодировку файлов самого лаунчера.
+            with self.tracer.span("popen"):
+                try:
+                    process = subprocess.Popen(
+                        [str(java_exe), '-jar', str(launcher_jar)],
+                        cwd=str(launcher_jar.parent),
+                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                        text=True, encoding=locale.getpreferredencoding(False), errors='replace',
+                        creationflags=CREATE_NO_WINDOW
+                    )
+                except OSError as e:
+                    # Java не запустилась вовсе (файл удалён, не та архитектура) — это тоже падение
+                    metric.update(outcome="crashed", error=str(e),
+                                  elapsed_ms=(time.perf_counter() - started) * 1000)
+                    span.update(metric)
+                    self.logger.error(f"Failed to start {java_exe}: {e}")
+                    self._save_metric(metric)
+                    return metric
+            metric['spawn_ms'] = (time.perf_counter() - started) * 1000
+            self.tracer.instant("launcher_spawned")
+
+            threading.Thread(target=self._pump_output, args=(process, marker, marker_seen),
+                             name="LauncherOutput", daemon=True).start()
+
+            deadline = started + settings['ready_timeout']
+            while True:
+                if marker_seen.is_set() or SystemUtils.has_visible_window(process.pid):
+                    metric['outcome'] = "ready"
+                    metric['ready_via'] = "marker" if marker_seen.is_set() else "window"
+                    break
+                exit_code = process.poll()
+                if exit_code is not None:
+                    metric['outcome'] = "exited" if exit_code == 0 else "crashed"
+                    metric['exit_code'] = exit_code
+                    break
+                if cancel_event.is_set():
+                    metric['outcome'] = "cancelled"
+                    break
+                if time.perf_counter() >= deadline:
+                    metric['outcome'] = "timeout"
+                    break
+                time.sleep(0.1)
+
+            metric['elapsed_ms'] = (time.perf_counter() - started) * 1000
+            if metric['outcome'] == "ready":
+                metric['ready_ms'] = metric['elapsed_ms']
+                self.tracer.instant("launcher_ready", via=metric['ready_via'])
+            span.update(metric)
+
+        self.logger.info(f"Launch with {java_exe}: {metric['outcome']} after {metric['elapsed_ms']:.0f} ms")
+        self._save_metric(metric)
+        return metric
+
+    def _pump_output(self, process: subprocess.Popen, marker: Optional["re.Pattern"], marker_seen: threading.Event):
+        """Переносит stdout/stderr JVM в лог прелаунчера.
+
+        Канал остаётся подключённым, пока жив прелаунчер. После его выхода читать
+        канал некому: вывод лаунчера теряется, а PrintStream в Java подавляет
+        ошибку записи (checkError), так что на работу лаунчера это не влияет.
+        """
+        try:
+            for line in process.stdout:
+                line = line.rstrip()
+                self.logger.info(f"[launcher] {line}")
+                if marker and marker.search(line):
+                    marker_seen.set()
+        except (OSError, ValueError):
+            pass
+
+    def _load_metrics(self) -> List[Dict[str, Any]]:
+        try:
+            with open(self.metrics_file, 'r', encoding='utf-8') as f:
+                metrics = json.load(f)
+            return metrics if isinstance(metrics, list) else []
+        except (OSError, json.JSONDecodeError):
+            return []
+
+    def _save_metric(self, metric: Dict[str, Any]):
+        metrics = (self._load_metrics() + [metric])[-CONFIG['launch']['metrics_limit']:]
+        try:
+            with open(self.metrics_file, 'w', encoding='utf-8') as f:
+                json.dump(metrics, f, ensure_ascii=False, indent=4)
+        except OSError as e:
+            self.logger.warning(f"Failed to save launch metrics: {e}")
+
+    def report(self) -> str:
+        """Сводка по каждой Java: число запусков, падения, медиана времени до готовности (--launch-stats)."""
+        by_java: Dict[str, List[Dict[str, Any]]] = {}
+        for metric in self._load_metrics():
+            by_java.setdefault(metric.get('java', '?'), []).append(metric)
+        if not by_java:
+            return "No launches recorded yet."
+
+        lines = []
+        for java, metrics in by_java.items():
+            ready = sorted(m['ready_ms'] for m in metrics if 'ready_ms' in m)
+            crashed = sum(1 for m in metrics if m.get('outcome') == "crashed")
+            median = f"{ready[len(ready) // 2]:.0f} ms" if ready else "-"
+            lines.append(f"{java}\n    launches {len(metrics)}, ready {len(ready)}, crashed {crashed}, "
+                         f"median time to ready {median}")
+        return "\n".join(lines)
+
+
+class HTTPRangeFile:
+    """Файл на HTTP-сервере, читаемый Range-запросами.
+
+    Нужен zipfile, чтобы прочитать центральный каталог архива, не скачивая сам архив.
+    """
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.timeout = timeout
+        self.position = 0
+        r = requests.head(url, timeout=timeout, allow_redirects=True)
+        r.raise_for_status()
+        if r.headers.get('Accept-Ranges', '').lower() != 'bytes':
+            raise OSError(f"Range requests are not supported by {url}")
+        self.size = int(r.headers['Content-Length'])
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self.position, os.SEEK_END: self.size}[whence]
+        self.position = min(max(base + offset, 0), self.size)
+        return self.position
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or self.position + size > self.size:
+            size = self.size - self.position
+        if size <= 0:
+            return b""
+        # stream=True: если сервер проигнорирует Range и ответит 200, тело (весь архив) не скачивается
+        with requests.get(self.url, headers={"Range": f"bytes={self.position}-{self.position + size - 1}"},
+                          timeout=self.timeout, stream=True) as r:
+            if r.status_code != 206:
+                raise OSError(f"Range requests are not supported by {self.url}")
+            data = r.content
+        self.position += len(data)
+        return data
+
+
+class HashingReader:
+    """Последовательное чтение файла с попутным подсчётом SHA-256 всех прочитанных байт."""
+
+    def __init__(self, f):
+        self._f = f
+        self._sha = hashlib.sha256()
+        self.position = 0
+
+    def read(self, size: int) -> bytes:
+        data = self._f.read(size)
+        self._sha.update(data)
+        self.position += len(data)
+        return data
+
+    def skip_to(self, offset: int):
+        """Дочитывает (и хеширует) байты до offset; назад не перематывает."""
+        if offset < self.position:
+            raise zipfile.BadZipFile("Overlapping entries in archive")
+        while self.position < offset:
+            if not self.read(min(offset - self.position, 1024 * 1024)):
+                raise zipfile.BadZipFile("Unexpected end of archive")
+
+    def read_to_end(self):
+        while self.read(1024 * 1024):
+            pass
+
+    def hexdigest(self) -> str:
+        return self._sha.hexdigest()
+
+
+def traced(name: str) -> Callable:
+    """Декоратор метода: оборачивает вызов в интервал self.tracer."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with self.tracer.span(name):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
 class JavaManager:
     """Отвечает за скачивание, проверку и установку Java (JRE)."""
 
-    def __init__(self, logger: logging.Logger, temp_dir: Path):
+    def __init__(self, logger: logging.Logger, temp_dir: Path, tracer: Optional[Tracer] = None,
+                 peers: Optional[PeerCache] = None, stats: Optional[MirrorStats] = None):
         self.logger = logger
         self.temp_dir = temp_dir
+        self.tracer = tracer or Tracer()
+        self.peers = peers
+        self.stats = stats
+        self.downloaded_sha: Optional[str] = None  # SHA-256 архива, прошедшего проверку
+        self.space_shortage: Optional[Dict[str, Any]] = None  # Последняя обнаруженная нехватка места
+
+    def apply_manifest(self, manifest: Dict[str, Any]) -> bool:
+        """Заменяет зеркала и версию Java из CONFIG данными проверенного манифеста."""
+        java = manifest.get('java')
+        if not isinstance(java, dict) or not isinstance(java.get('mirrors'), list):
+            self.logger.warning("Manifest has no Java section, keeping built-in mirrors.")
+            return False
+
+        mirrors = []
+        for mirror in java['mirrors']:
+            if self._valid_mirror(mirror):
+                mirrors.append(dict(mirror))
+            else:
+                self.logger.warning(f"Skipping invalid manifest mirror entry: {mirror!r:.200}")
+        if not mirrors:
+            self.logger.warning("Manifest has no valid Java mirrors, keeping built-in ones.")
+            return False
+
+        CONFIG['java']['mirrors'] = mirrors
+        if isinstance(java.get('version'), str) and java['version']:
+            CONFIG['java']['version'] = java['version']
+        self.logger.info(f"Using artifact manifest: {len(mirrors)} Java mirror(s), version {CONFIG['java']['version']}")
+        return True
+
+    @staticmethod
+    def _valid_mirror(mirror: Any) -> bool:
+        """Проверяет типы всех полей записи зеркала, которыми пользуется загрузчик."""
+        def is_sha256(value: Any) -> bool:
+            return isinstance(value, str) and re.fullmatch(r'[0-9a-fA-F]{64}', value) is not None
+
+        def is_positive_int(value: Any) -> bool:
+            return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+        if not isinstance(mirror, dict) or not isinstance(mirror.get('url'), str) or not is_sha256(mirror.get('sha256')):
+            return False
+        if any(key in mirror and not is_positive_int(mirror[key]) for key in ('size', 'unpacked_size', 'chunk_size')):
+            return False
+        if 'chunks' in mirror:
+            chunks = mirror['chunks']
+            if not isinstance(chunks, list) or not chunks or not all(is_sha256(h) for h in chunks):
+                return False
+        return True
+
+    def probe_archive_sizes(self) -> Tuple[Optional[int], Optional[int]]:
+        """Размер архива и распакованной JRE до загрузки.
+
+        Берётся из записи зеркала ("size", "unpacked_size") или из центрального каталога
+        удалённого zip, прочитанного парой Range-запросов.
+        """
+        mirrors = CONFIG['java']['mirrors']
+        if self.stats is not None:
+            mirrors = self.stats.order(mirrors)
+
+        for mirror in mirrors:
+            if mirror.get('size') and mirror.get('unpacked_size'):
+                return int(mirror['size']), int(mirror['unpacked_size'])
+            try:
+                with self.tracer.span("probe_archive_sizes", url=mirror['url']):
+                    remote = HTTPRangeFile(mirror['url'], timeout=5)
+                    with zipfile.ZipFile(remote) as zip_ref:
+                        return remote.size, sum(m.file_size for m in zip_ref.infolist())
+            except (requests.RequestException, OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+                self.logger.debug(f"Could not read archive sizes from {mirror['url']}: {e}")
+        return None, None
+
+    def check_disk_space(self, archive_size: Optional[int] = None,
+                         unpacked_size: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Сверяет нужное место (архив во временной папке, JRE в install_path) со свободным на томах.
+
+        Если обе папки на одном томе, требования складываются. Возвращает описание
+        нехватки ({"path", "needed", "free"} в байтах) или None.
+        """
+        temp_zip = self.temp_dir / "java.zip"
+        if archive_size and temp_zip.exists():
+            archive_size = max(archive_size - temp_zip.stat().st_size, 0)  # Докачка
+
+        volumes: Dict[int, List[Any]] = {}
+        for path, size in ((self.temp_dir, archive_size), (CONFIG['java']['install_path'], unpacked_size)):
+            if not size:
+                continue
+            anchor = SystemUtils.existing_ancestor(path)
+            volume = volumes.setdefault(os.stat(anchor).st_dev, [anchor, 0])
+            volume[1] += size
+
+        self.space_shortage = None
+        for anchor, needed in volumes.values():
+            needed += CONFIG['java']['space_margin']
+            free = shutil.disk_usage(anchor).free
+            if free < needed:
+                self.space_shortage = {"path": str(anchor.anchor or anchor), "needed": needed, "free": free}
+                self.logger.error(f"Not enough disk space on {anchor}: {needed} bytes required, {free} free.")
+                break
+        return self.space_shortage
+
+    @traced("preflight")
+    def preflight(self) -> Optional[Dict[str, Any]]:
+        """Проверка места на дисках до начала загрузки Java."""
+        archive_size, unpacked_size = self.probe_archive_sizes()
+        if archive_size is None:
+            self.logger.warning("Archive size unknown, skipping disk space preflight.")
+            return None
+        self.logger.info(f"Java needs {archive_size / 1024 / 1024:.1f} MB to download and "
+                         f"{(unpacked_size or 0) / 1024 / 1024:.1f} MB to install.")
+        return self.check_disk_space(archive_size, unpacked_size)
 
     def verify_checksum(self, filepath: Path, expected_hash: str) -> bool:
         """Проверяет SHA-256 файла."""
@@ -218,87 +1203,232 @@ class JavaManager:
         
         sha = hashlib.sha256()
         try:
-            with open(filepath, "rb") as f:
-                while chunk := f.read(1024 * 1024):  # Читаем по 1 МБ
-                    sha.update(chunk)
-            return sha.hexdigest().lower() == expected_hash.lower()
+            with self.tracer.span("verify_checksum", file=filepath.name) as span:
+                with open(filepath, "rb") as f:
+                    while chunk := f.read(1024 * 1024):  # Читаем по 1 МБ
+                        sha.update(chunk)
+                span['bytes'] = filepath.stat().st_size
+                span['match'] = sha.hexdigest().lower() == expected_hash.lower()
+            return span['match']
         except Exception as e:
             self.logger.error(f"Checksum verification failed: {e}")
             return False
 
+    @traced("download_java")
     def download_java(self, 
                       progress_callback: Callable[[float], None], 
                       cancel_event: threading.Event) -> bool:
         """Скачивает архив Java частями, перебирая зеркала. Поддерживает прерывание через cancel_event."""
+        try:
+            return self._download_java(progress_callback, cancel_event)
+        finally:
+            if self.stats is not None:
+                self.stats.save()
+
+    def _download_java(self, progress_callback: Callable[[float], None], cancel_event: threading.Event) -> bool:
         temp_zip = self.temp_dir / "java.zip"
+        mirrors = list(CONFIG['java']['mirrors'])
+
+        # Быстрые и надёжные по прошлым запускам зеркала — первыми
+        if self.stats is not None:
+            mirrors = self.stats.order(mirrors)
+            self.logger.info("Mirror order: " + ", ".join(
+                f"{m['url']} ({self.stats.score(m['url']):.0f} s)" for m in mirrors))
+
+        # Сначала соседи по локальной сети: их архив проверяется тем же SHA-256
+        if self.peers is not None and not cancel_event.is_set():
+            try:
+                mirrors = self.peers.discover([m['sha256'] for m in mirrors]) + mirrors
+            except Exception as e:
+                self.logger.warning(f"LAN peer discovery failed: {e}")
         
-        for mirror_idx, mirror in enumerate(CONFIG['java']['mirrors']):
+        for mirror_idx, mirror in enumerate(mirrors):
             url = mirror['url']
             expected_sha = mirror['sha256']
+            is_peer = mirror.get('peer', False)
+            # Соседа пробуем один раз и с коротким таймаутом — дальше есть зеркала
+            retries = 1 if is_peer else CONFIG['max_retries']
+            stats = None if is_peer else self.stats  # Адреса соседей случайны, их не запоминаем
+            if is_peer:
+                chunk_size, timeout = MirrorStats.DEFAULT_CHUNK_SIZE, 3
+            elif stats is not None:
+                chunk_size, timeout = stats.tuning(url)
+            else:
+                chunk_size, timeout = MirrorStats.DEFAULT_CHUNK_SIZE, MirrorStats.DEFAULT_TIMEOUT
             
-            self.logger.info(f"Trying mirror {mirror_idx + 1}: {url}")
+            self.logger.info(f"Trying {'LAN peer' if is_peer else 'mirror'} {mirror_idx + 1}: {url}")
             
-            for attempt in range(CONFIG['max_retries']):
-                if cancel_event.is_set():
-                    return False
+            with self.tracer.span("mirror", url=url, index=mirror_idx + 1, peer=is_peer):
+                for attempt in range(retries):
+                    if cancel_event.is_set():
+                        return False
+
+                    if temp_zip.exists() and self.verify_checksum(temp_zip, expected_sha):
+                        self.logger.info("Valid Java archive already exists.")
+                        self.downloaded_sha = expected_sha
+                        return True
 
-                if temp_zip.exists() and self.verify_checksum(temp_zip, expected_sha):
-                    self.logger.info("Valid Java archive already exists.")
-                    return True
-                    
-                self.logger.info(f"Downloading Java (Attempt {attempt + 1}/{CONFIG['max_retries']} from mirror {mirror_idx + 1})")
-                
-                try:
-                    with requests.get(url, stream=True, timeout=10) as r:
-                        r.raise_for_status()
-                        total_length = int(r.headers.get('content-length', 0))
-                        downloaded = 0
+                    # Недокачанный/повреждённый архив с поблочными хешами — докачиваем только плохие блоки
+                    verifier = ChunkVerifier(mirror) if mirror.get('chunks') else None
+                    sources = [m['url'] for m in mirrors if m['sha256'].lower() == expected_sha.lower()]
+                    if verifier and temp_zip.exists():
+                        bad = verifier.scan(temp_zip)
+                        if len(bad) <= len(verifier.hashes) // 2:
+                            self.logger.info(f"Resuming archive: {len(bad)} of {len(verifier.hashes)} block(s) to fetch.")
+                            if self._repair_chunks(temp_zip, verifier, bad, sources, cancel_event) \
+                                    and self.verify_checksum(temp_zip, expected_sha):
+                                self.downloaded_sha = expected_sha
+                                return True
                         
-                        with open(temp_zip, "wb") as f:
-                            for chunk in r.iter_content(chunk_size=1024 * 512): # Чанки по 512КБ
-                                if cancel_event.is_set():
-                                    self.logger.warning("Download cancelled by user.")
+                    self.logger.info(f"Downloading Java (Attempt {attempt + 1}/{retries} from mirror {mirror_idx + 1})")
+                    
+                    with self.tracer.span("download_attempt", attempt=attempt + 1) as span:
+                        try:
+                            with requests.get(url, stream=True, timeout=timeout) as r:
+                                r.raise_for_status()
+                                total_length = int(r.headers.get('content-length', 0))
+                                downloaded = 0
+                                stream_sha = hashlib.sha256()  # Хеш считаем на лету, без повторного чтения файла
+                                started = last_sample = time.perf_counter()
+                                last_bytes = 0
+                                span['ttfb_ms'] = r.elapsed.total_seconds() * 1000
+                                
+                                if total_length and self.check_disk_space(archive_size=total_length):
                                     return False
-                                    
-                                if chunk:
-                                    f.write(chunk)
-                                    downloaded += len(chunk)
+
+                                with open(temp_zip, "wb") as f:
                                     if total_length:
-                                        progress = (downloaded / total_length) * 100
-                                        progress_callback(progress)
-                                        
-                    if self.verify_checksum(temp_zip, expected_sha):
-                        return True
-                    else:
-                        self.logger.error("Checksum mismatch, removing corrupted archive.")
-                        temp_zip.unlink(missing_ok=True)
-                        
-                except requests.RequestException as e:
-                    self.logger.error(f"Network error during download: {e}")
-                    temp_zip.unlink(missing_ok=True)
+                                        SystemUtils.preallocate(f, total_length)
+                                    for chunk in r.iter_content(chunk_size=chunk_size):
+                                        if cancel_event.is_set():
+                                            self.logger.warning("Download cancelled by user.")
+                                            return False
+                                            
+                                        if chunk:
+                                            f.write(chunk)
+                                            stream_sha.update(chunk)
+                                            downloaded += len(chunk)
+                                            if verifier:
+                                                verifier.feed(chunk)
+                                            if total_length:
+                                                progress = (downloaded / total_length) * 100
+                                                progress_callback(progress)
+
+                                            now = time.perf_counter()
+                                            if now - last_sample >= 0.25:
+                                                self.tracer.counter("download_speed", bytes_per_sec=(downloaded - last_bytes) / (now - last_sample))
+                                                last_sample, last_bytes = now, downloaded
+
+                                    f.truncate()  # Если сервер прислал меньше, чем обещал
+
+                                span['bytes'] = downloaded
+                                span['bytes_per_sec'] = downloaded / max(time.perf_counter() - started, 1e-6)
+
+                            valid = stream_sha.hexdigest() == expected_sha.lower()
+                            if verifier and not valid:
+                                bad = verifier.finish()
+                                if bad:
+                                    self.logger.warning(f"{len(bad)} corrupted block(s) detected, re-fetching them.")
+                                # Без плохих блоков _repair_chunks только отрезает лишние данные за концом архива
+                                valid = self._repair_chunks(temp_zip, verifier, bad, sources, cancel_event) \
+                                    and self.verify_checksum(temp_zip, expected_sha)
+                                                
+                            if stats is not None:
+                                stats.record(url, ttfb=span['ttfb_ms'] / 1000, throughput=span['bytes_per_sec'],
+                                             mismatch=not valid)
+
+                            if valid:
+                                self.downloaded_sha = expected_sha
+                                return True
+                            else:
+                                span['error'] = "checksum mismatch"
+                                self.logger.error("Checksum mismatch, removing corrupted archive.")
+                                temp_zip.unlink(missing_ok=True)
+                                
+                        except requests.RequestException as e:
+                            span['error'] = str(e)
+                            self.logger.error(f"Network error during download: {e}")
+                            if stats is not None:
+                                stats.record(url, failure=True)
+                            # С поблочными хешами недокачанный файл пригодится для докачки
+                            if not verifier:
+                                temp_zip.unlink(missing_ok=True)
                     
         # Если все зеркала и попытки исчерпаны
         return False
 
-    def install_java(self, cancel_event: threading.Event) -> bool:
-        """Распаковывает скачанную Java в целевую директорию."""
+    def _repair_chunks(self, temp_zip: Path, verifier: ChunkVerifier, bad: List[int],
+                       sources: List[str], cancel_event: threading.Event) -> bool:
+        """Перекачивает испорченные блоки по Range, перебирая все зеркала с тем же архивом."""
+        no_range = set()  # Источники, ответившие 200 на Range, до конца починки не опрашиваем
+        with self.tracer.span("repair_chunks", blocks=len(bad)) as span:
+            with open(temp_zip, "r+b" if temp_zip.exists() else "w+b") as f:
+                for index in bad:
+                    for url in sources:
+                        if url in no_range:
+                            continue
+                        if cancel_event.is_set():
+                            return False
+                        try:
+                            # stream=True: при ответе 200 тело (весь архив) не скачивается
+                            with requests.get(url, headers={"Range": verifier.block_range(index)},
+                                              timeout=10, stream=True) as r:
+                                if r.status_code != 206:
+                                    self.logger.debug(f"{url} answered {r.status_code} to a Range request.")
+                                    if r.status_code == 200:
+                                        no_range.add(url)
+                                    continue
+                                data = r.content
+                            if not verifier.check(index, data):
+                                self.logger.warning(f"Block {index} from {url} is corrupted.")
+                                continue
+                            f.seek(index * verifier.chunk_size)
+                            f.write(data)
+                            break
+                        except requests.RequestException as e:
+                            self.logger.warning(f"Failed to fetch block {index} from {url}: {e}")
+                    else:
+                        span['error'] = f"block {index} unavailable"
+                        return False
+
+                if verifier.size is not None:
+                    f.truncate(verifier.size)  # Отрезаем мусор за последним блоком
+        return True
+
+    @traced("install_java")
+    def install_java(self, cancel_event: threading.Event, expected_sha: Optional[str] = None) -> bool:
+        """Распаковывает скачанную Java в целевую директорию.
+
+        Если известен SHA-256 архива (и включён single_pass_install), архив читается
+        с диска один раз: хеш, распаковка во временную папку и проверка CRC идут
+        одним проходом, а установка фиксируется только при совпадении хеша.
+        """
         temp_zip = self.temp_dir / "java.zip"
         install_path: Path = CONFIG['java']['install_path']
         
         try:
+            with zipfile.ZipFile(temp_zip, 'r') as zip_ref:
+                unpacked_size = sum(m.file_size for m in zip_ref.infolist())
+            if self.check_disk_space(unpacked_size=unpacked_size):
+                return False
+
+            if expected_sha and CONFIG['java']['single_pass_install']:
+                return self._install_single_pass(temp_zip, install_path, expected_sha, cancel_event)
+
             install_path.mkdir(parents=True, exist_ok=True)
             
-            with zipfile.ZipFile(temp_zip, 'r') as zip_ref:
-                if cancel_event.is_set(): return False
-                zip_ref.extractall(install_path)
+            with zipfile.ZipFile(temp_zip, 'r') as zip_ref, self.tracer.span("extract", file=temp_zip.name):
+                members = zip_ref.infolist()
+                # Распаковка пачками: между ними проверяем отмену и пишем интервал в трассу
+                for start in range(0, len(members), 256):
+                    if cancel_event.is_set(): return False
+                    batch = members[start:start + 256]
+                    with self.tracer.span("extract_batch", first=start, entries=len(batch),
+                                          bytes=sum(m.file_size for m in batch)):
+                        for member in batch:
+                            zip_ref.extract(member, install_path)
             
-            # Обработка вложенной папки (динамический поиск папки, содержащей bin)
-            subdirs = [d for d in install_path.iterdir() if d.is_dir()]
-            if len(subdirs) == 1 and (subdirs[0] / 'bin').exists():
-                nested_dir = subdirs[0]
-                for item in nested_dir.iterdir():
-                    shutil.move(str(item), str(install_path))
-                nested_dir.rmdir()
+            self._flatten_nested_dir(install_path)
             
             java_exe = install_path / 'bin' / 'javaw.exe'
             if not java_exe.exists():
@@ -310,6 +1440,125 @@ class JavaManager:
             self.logger.error(f"Java installation failed: {e}")
             return False
 
+    @staticmethod
+    def _flatten_nested_dir(path: Path):
+        """Обработка вложенной папки (динамический поиск папки, содержащей bin)."""
+        subdirs = [d for d in path.iterdir() if d.is_dir()]
+        if len(subdirs) == 1 and (subdirs[0] / 'bin').exists():
+            nested_dir = subdirs[0]
+            for item in nested_dir.iterdir():
+                shutil.move(str(item), str(path))
+            nested_dir.rmdir()
+
+    def _install_single_pass(self, temp_zip: Path, install_path: Path, expected_sha: str,
+                             cancel_event: threading.Event) -> bool:
+        staging = install_path.with_name(install_path.name + ".staging")
+        shutil.rmtree(staging, ignore_errors=True)
+        try:
+            staging.mkdir(parents=True)
+            if not self._extract_verified(temp_zip, staging, expected_sha, cancel_event):
+                return False
+
+            self._flatten_nested_dir(staging)
+            if not (staging / 'bin' / 'javaw.exe').exists():
+                raise FileNotFoundError("javaw.exe not found after extraction")
+
+            # Фиксация: старая установка убирается в сторону и удаляется только после замены
+            backup = install_path.with_name(install_path.name + ".old")
+            shutil.rmtree(backup, ignore_errors=True)
+            if install_path.exists():
+                os.replace(install_path, backup)
+            try:
+                os.replace(staging, install_path)
+            except OSError:
+                if backup.exists():
+                    os.replace(backup, install_path)
+                raise
+            shutil.rmtree(backup, ignore_errors=True)
+            return True
+        finally:
+            # Откат: при любой ошибке, отмене или несовпадении хеша staging удаляется
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def _extract_verified(self, temp_zip: Path, target: Path, expected_sha: str,
+                          cancel_event: threading.Event) -> bool:
+        """Один последовательный проход по архиву: SHA-256, распаковка и проверка CRC записей."""
+        with zipfile.ZipFile(temp_zip, 'r') as zip_ref:
+            members = sorted(zip_ref.infolist(), key=lambda m: m.header_offset)
+
+        target_root = os.path.normpath(target.resolve())
+        created_dirs = {target_root}
+        with open(temp_zip, "rb") as f, self.tracer.span("extract_verified", file=temp_zip.name) as span:
+            reader = HashingReader(f)
+            for start in range(0, len(members), 256):
+                if cancel_event.is_set():
+                    return False
+                batch = members[start:start + 256]
+                with self.tracer.span("extract_batch", first=start, entries=len(batch),
+                                      bytes=sum(m.file_size for m in batch)):
+                    for member in batch:
+                        self._extract_member(reader, member, target_root, created_dirs)
+
+            reader.read_to_end()  # Центральный каталог тоже входит в хеш файла
+            span['bytes'] = reader.position
+            if reader.hexdigest() != expected_sha.lower():
+                self.logger.error("Archive checksum mismatch during installation, rolling back.")
+                return False
+        return True
+
+    @staticmethod
+    def _extract_member(reader: "HashingReader", member: zipfile.ZipInfo, target_root: str, created_dirs: set):
+        reader.skip_to(member.header_offset)
+        header = reader.read(30)  # Локальный заголовок записи фиксированной длины
+        if header[:4] != b"PK\x03\x04":
+            raise zipfile.BadZipFile(f"Bad local header for {member.filename}")
+        name_length, extra_length = struct.unpack("<2H", header[26:30])
+        reader.read(name_length + extra_length)
+
+        if member.flag_bits & 0x1:
+            raise zipfile.BadZipFile(f"Encrypted entry {member.filename} is not supported")
+        if member.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise zipfile.BadZipFile(f"Unsupported compression for {member.filename}")
+
+        # Защита от выхода за пределы папки (абсолютные пути, "..", буквы дисков)
+        destination = os.path.normpath(os.path.join(target_root, member.filename.replace('\\', '/')))
+        if not destination.startswith(target_root + os.sep):
+            raise zipfile.BadZipFile(f"Unsafe path in archive: {member.filename}")
+
+        parent = destination if member.is_dir() else os.path.dirname(destination)
+        if parent not in created_dirs:
+            os.makedirs(parent, exist_ok=True)
+            created_dirs.add(parent)
+        if member.is_dir():
+            return
+
+        inflater = zlib.decompressobj(-15) if member.compress_type == zipfile.ZIP_DEFLATED else None
+        crc = 0
+        written = 0
+        remaining = member.compress_size
+        with open(destination, "wb") as out:
+            if member.file_size >= 1024 * 1024:
+                SystemUtils.preallocate(out, member.file_size)
+            while remaining > 0:
+                data = reader.read(min(remaining, 1024 * 1024))
+                if not data:
+                    raise zipfile.BadZipFile(f"Unexpected end of archive in {member.filename}")
+                remaining -= len(data)
+                if inflater:
+                    data = inflater.decompress(data)
+                crc = zlib.crc32(data, crc)
+                written += len(data)
+                out.write(data)
+            if inflater:
+                tail = inflater.flush()
+                crc = zlib.crc32(tail, crc)
+                written += len(tail)
+                out.write(tail)
+
+        if crc != member.CRC or written != member.file_size:
+            raise zipfile.BadZipFile(f"CRC check failed for {member.filename}")
+
+    @traced("find_existing_javas")
     def find_existing_javas(self) -> List[Path]:
         """Ищет ВСЕ установленные версии Java с проверкой наличия JavaFX (jfxrt.jar)."""
         search_paths = []
@@ -357,28 +1606,34 @@ class JavaManager:
                 continue
             resolved_paths.add(res_path)
                 
-            # КРИТИЧЕСКАЯ ПРОВЕРКА: Ищем файл JavaFX (jfxrt.jar)
-            # Учитываем, что это может быть JRE (папка lib) или JDK (папка jre/lib)
-            jfx_jre = res_path.parent.parent / "lib" / "ext" / "jfxrt.jar"
-            jfx_jdk = res_path.parent.parent / "jre" / "lib" / "ext" / "jfxrt.jar"
-            
-            if not (jfx_jre.exists() or jfx_jdk.exists()):
-                self.logger.debug(f"Skipping {res_path}: JavaFX (jfxrt.jar) not found.")
-                continue
+            with self.tracer.span("java_candidate", path=str(res_path)) as span:
+                # КРИТИЧЕСКАЯ ПРОВЕРКА: Ищем файл JavaFX (jfxrt.jar)
+                # Учитываем, что это может быть JRE (папка lib) или JDK (папка jre/lib)
+                jfx_jre = res_path.parent.parent / "lib" / "ext" / "jfxrt.jar"
+                jfx_jdk = res_path.parent.parent / "jre" / "lib" / "ext" / "jfxrt.jar"
+                
+                if not (jfx_jre.exists() or jfx_jdk.exists()):
+                    span['result'] = "no javafx"
+                    self.logger.debug(f"Skipping {res_path}: JavaFX (jfxrt.jar) not found.")
+                    continue
 
-            # Если FX есть, проверяем версию Java
-            try:
-                result = subprocess.run(
-                    [str(res_path), "-version"],
-                    stderr=subprocess.PIPE, text=True,
-                    creationflags=subprocess.CREATE_NO_WINDOW
-                )
-                if CONFIG['java']['version'] in result.stderr:
-                    self.logger.info(f"Found valid Java WITH JavaFX: {res_path}")
-                    valid_javas.append(res_path)
-            except Exception as e:
-                self.logger.debug(f"Failed to check java version for {res_path}: {e}")
-                continue
+                # Если FX есть, проверяем версию Java
+                try:
+                    result = subprocess.run(
+                        [str(res_path), "-version"],
+                        stderr=subprocess.PIPE, text=True,
+                        creationflags=CREATE_NO_WINDOW
+                    )
+                    if CONFIG['java']['version'] in result.stderr:
+                        span['result'] = "valid"
+                        self.logger.info(f"Found valid Java WITH JavaFX: {res_path}")
+                        valid_javas.append(res_path)
+                    else:
+                        span['result'] = "wrong version"
+                except Exception as e:
+                    span['result'] = "probe failed"
+                    self.logger.debug(f"Failed to check java version for {res_path}: {e}")
+                    continue
 
         return valid_javas
 
@@ -390,7 +1645,7 @@ class PrelauncherApp:
         SystemUtils.require_admin()
         
         # Разделяем основную папку лаунчера и временную папку загрузок
-        self.app_dir = Path(os.getenv('APPDATA', 'C:/')) / 'PixelmonPRO'
+        self.app_dir = APP_DIR
         self.app_dir.mkdir(parents=True, exist_ok=True)
         
         self.temp_dir = self.app_dir / 'tmp'
@@ -408,8 +1663,18 @@ class PrelauncherApp:
         self.selected_java: Optional[Path] = None
         self.log_text = ""
         
+        self.tracer = Tracer(enabled=CONFIG['debug'])
         self.setup_logging()
-        self.java_manager = JavaManager(self.logger, self.temp_dir)
+
+        # Обмен архивом Java по локальной сети (клубы, компьютерные клубы на ивентах) — только по желанию
+        self.peer_cache: Optional[PeerCache] = None
+        if CONFIG['lan_peers']['enabled'] or self.get_config_value("lan_peers", False):
+            self.peer_cache = PeerCache(self.logger, self.app_dir / 'peer_cache', self.tracer)
+
+        self.mirror_stats = MirrorStats(self.logger, self.app_dir / 'mirror_stats.json')
+        self.launch_supervisor = LaunchSupervisor(self.logger, self.app_dir / 'launch_metrics.json', self.tracer)
+        self.java_manager = JavaManager(self.logger, self.temp_dir, self.tracer, self.peer_cache, self.mirror_stats)
+        self.manifest_client = ManifestClient(self.logger, self.app_dir / 'manifest_cache.json', self.tracer)
         
         dpg.create_context()
         self.setup_ui()
@@ -418,11 +1683,11 @@ class PrelauncherApp:
         self.logger = logging.getLogger("Prelauncher")
         self.logger.setLevel(logging.DEBUG if CONFIG['debug'] else logging.INFO)
         
+        self.log_dir = Path("logs")
         if CONFIG['debug']:
-            log_dir = Path("logs")
-            log_dir.mkdir(exist_ok=True)
+            self.log_dir.mkdir(exist_ok=True)
             handler = RotatingFileHandler(
-                log_dir / "installer.log", maxBytes=1024*1024, backupCount=5, encoding='utf-8'
+                self.log_dir / "installer.log", maxBytes=1024*1024, backupCount=5, encoding='utf-8'
             )
             handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)-8s] %(message)s'))
             self.logger.addHandler(handler)
@@ -486,8 +1751,53 @@ class PrelauncherApp:
             dpg.set_value("progress_bar", percentage / 100.0)
             dpg.configure_item("progress_bar", overlay=f"{percentage:.0f}%")
 
+    def report_space_shortage(self, shortage: Dict[str, Any]):
+        """Показывает понятное сообщение о нехватке места на диске."""
+        self.update_status("not_enough_space", path=shortage['path'],
+                           needed=shortage['needed'] / 1024 / 1024, free=shortage['free'] / 1024 / 1024)
+
+    def share_cached_archives(self):
+        """Проверяет архивы, оставшиеся в кэше с прошлых запусков, и раздаёт их соседям."""
+        for mirror in CONFIG['java']['mirrors']:
+            cached = self.peer_cache.archive_path(mirror['sha256'])
+            if not cached.exists():
+                continue
+            if self.java_manager.verify_checksum(cached, mirror['sha256']):
+                self.peer_cache.publish(cached, mirror['sha256'])
+            else:
+                self.logger.warning(f"Removing corrupted peer cache archive: {cached}")
+                cached.unlink(missing_ok=True)
+
+    def save_trace(self):
+        """Записывает трассу рядом с installer.log (только в режиме отладки)."""
+        try:
+            self.tracer.save(self.log_dir / "installer.trace.json")
+        except Exception as e:
+            self.logger.warning(f"Failed to save trace: {e}")
+
+    def run_installation(self):
+        """Точка входа рабочего потока: трасса сохраняется сразу после установки,
+        чтобы она не потерялась, если процесс потом завершат принудительно."""
+        try:
+            self.installation_worker()
+        finally:
+            self.save_trace()
+
+    @traced("installation_worker")
     def installation_worker(self):
         """Фоновый поток для выполнения тяжелых задач (скачивание/установка)."""
+        # Манифест может заменить зеркала и версию Java, поэтому загружаем его первым.
+        # Любая ошибка в нём не должна останавливать установку — остаётся встроенный CONFIG.
+        try:
+            manifest = self.manifest_client.load()
+            if manifest:
+                self.java_manager.apply_manifest(manifest)
+        except Exception as e:
+            self.log_to_ui(f"Artifact manifest ignored, using built-in mirrors: {e}", "WARNING")
+
+        if self.peer_cache is not None:
+            threading.Thread(target=self.share_cached_archives, name="PeerShare", daemon=True).start()
+
         try:
             available_javas = self.java_manager.find_existing_javas()
             java_path = None
@@ -513,8 +1823,9 @@ class PrelauncherApp:
                         dpg.configure_item("java_selection_modal", show=True)
                         
                     # Ждем, пока пользователь не выберет Java (или не нажмет отмену/скачивание)
-                    while not self.java_selected_event.is_set() and not self.cancel_event.is_set():
-                        time.sleep(0.1)
+                    with self.tracer.span("wait_java_selection", cat="ui"):
+                        while not self.java_selected_event.is_set() and not self.cancel_event.is_set():
+                            time.sleep(0.1)
                         
                     if self.cancel_event.is_set():
                         self.update_status("cancelled")
@@ -527,13 +1838,22 @@ class PrelauncherApp:
 
             # Запускаем загрузку, если Java не найдена или пользователь запросил это явно
             if not available_javas or force_download:
+                # Статус выставляем до проверки места: она может опрашивать зеркала несколько секунд
                 self.update_status("downloading_java")
+                shortage = self.java_manager.preflight()
+                if shortage:
+                    self.report_space_shortage(shortage)
+                    return
+
                 success = self.java_manager.download_java(self.set_progress, self.cancel_event)
                 
                 if self.cancel_event.is_set():
                     self.update_status("cancelled")
                     return
                 if not success:
+                    if self.java_manager.space_shortage:
+                        self.report_space_shortage(self.java_manager.space_shortage)
+                        return
                     self.update_status("download_failed")
                     self.log_to_ui("Failed to download Java.", "ERROR")
                     return
@@ -541,9 +1861,14 @@ class PrelauncherApp:
                 self.update_status("installing_java")
                 self.set_progress(100) # Индикатор для пользователя
                 
-                if not self.java_manager.install_java(self.cancel_event):
+                if not self.java_manager.install_java(self.cancel_event, self.java_manager.downloaded_sha):
+                    if self.java_manager.space_shortage:
+                        self.report_space_shortage(self.java_manager.space_shortage)
                     self.log_to_ui("Failed to install Java.", "ERROR")
                     return
+
+                if self.peer_cache is not None and self.java_manager.downloaded_sha:
+                    self.peer_cache.publish(self.temp_dir / "java.zip", self.java_manager.downloaded_sha)
                     
                 java_path = CONFIG['java']['install_path'] / 'bin' / 'javaw.exe'
 
@@ -564,8 +1889,9 @@ class PrelauncherApp:
                             dpg.configure_item("language_warning_modal", show=True)
                         
                         self.log_to_ui("Waiting for rule acknowledgement...", "WARNING")
-                        while not self.lang_warning_event.is_set() and not self.cancel_event.is_set():
-                            time.sleep(0.1)
+                        with self.tracer.span("wait_rule_acknowledgement", cat="ui"):
+                            while not self.lang_warning_event.is_set() and not self.cancel_event.is_set():
+                                time.sleep(0.1)
                             
                         if self.cancel_event.is_set():
                             self.update_status("cancelled")
@@ -577,6 +1903,7 @@ class PrelauncherApp:
         except Exception as e:
             self.log_to_ui(f"Critical installation error: {e}", "ERROR")
 
+    @traced("extract_launcher")
     def extract_launcher(self) -> Path:
         """Извлекает JAR лаунчера из ресурсов PyInstaller в ОСНОВНУЮ папку."""
         source_jar = SystemUtils.resource_path(LAUNCHER_JAR)
@@ -591,30 +1918,60 @@ class PrelauncherApp:
                 except PermissionError:
                     self.logger.warning("Could not delete old JAR, it might be running.")
             
-            shutil.copy2(source_jar, target_jar)
+            with self.tracer.span("launcher_copy", bytes=source_jar.stat().st_size):
+                shutil.copy2(source_jar, target_jar)
             self.logger.info(f"Launcher extracted to: {target_jar}")
             return target_jar
         else:
             self.logger.warning("Running in DEV mode. Using local JAR.")
             return Path(LAUNCHER_JAR)
 
+    def fallback_javas(self):
+        """Следующие кандидаты после упавшей Java: другие найденные версии, затем наша JRE."""
+        yield from self.java_manager.find_existing_javas()
+        bundled = CONFIG['java']['install_path'] / 'bin' / 'javaw.exe'
+        if bundled.exists():
+            yield bundled
+
     def launch_game(self, java_exe: Path, launcher_jar: Path):
-        """Запускает основной лаунчер и закрывает прелаунчер."""
+        """Запускает основной лаунчер и закрывает прелаунчер, когда лаунчер поднялся.
+
+        Если JVM падает сразу (не та архитектура, битая JRE), тут же пробует следующую Java.
+        """
         if not launcher_jar.exists():
             self.log_to_ui(f"JAR not found: {launcher_jar}", "ERROR")
             return
 
-        try:
-            # Запускаем Java с указанием cwd (рабочей папки), чтобы лаунчер видел свои конфиги
-            subprocess.Popen(
-                [str(java_exe), '-jar', str(launcher_jar)],
-                cwd=str(launcher_jar.parent), 
-                creationflags=subprocess.CREATE_NEW_CONSOLE
-            )
-            # Отложенное закрытие для плавности UI
-            threading.Timer(1.0, dpg.stop_dearpygui).start()
-        except Exception as e:
-            self.log_to_ui(f"Launch error: {e}", "ERROR")
+        tried = set()
+        candidates = self.fallback_javas()
+        java: Optional[Path] = java_exe
+        while java is not None:
+            try:
+                key = java.resolve()
+            except Exception:
+                key = java
+
+            if key not in tried:
+                tried.add(key)
+                try:
+                    metric = self.launch_supervisor.launch(java, launcher_jar, self.cancel_event)
+                except Exception as e:
+                    self.log_to_ui(f"Launch error with {java}: {e}", "ERROR")
+                    metric = {"outcome": "crashed", "error": str(e)}
+
+                if metric['outcome'] != "crashed":
+                    if metric['outcome'] == "timeout":
+                        self.log_to_ui("Launcher window not detected in time, assuming it is running.", "WARNING")
+                    if metric['outcome'] != "cancelled":
+                        dpg.stop_dearpygui()
+                    return
+
+                reason = f"exited with code {metric['exit_code']}" if 'exit_code' in metric else f"failed to start ({metric.get('error')})"
+                self.log_to_ui(f"Java {java} {reason}, trying another Java...", "WARNING")
+
+            java = next(candidates, None)
+
+        self.log_to_ui("Launcher failed to start with every available Java.", "ERROR")
 
     def on_cancel_clicked(self):
         """Обработчик кнопки Отмена (в главном окне)."""
@@ -813,7 +2170,7 @@ class PrelauncherApp:
         self.logger.info("=== Starting Prelauncher ===")
         
         # Запускаем логику в отдельном потоке
-        worker_thread = threading.Thread(target=self.installation_worker, daemon=True)
+        worker_thread = threading.Thread(target=self.run_installation, daemon=True)
         worker_thread.start()
         
         # Заменяем стандартный dpg.start_dearpygui() на кастомный Event Loop 
@@ -843,9 +2200,29 @@ class PrelauncherApp:
             worker_thread.join(timeout=2.0)
             
         dpg.destroy_context()
+
+        self.save_trace()
+
+        # Окно уже закрыто; раздаём архив соседям, пока они его качают
+        if self.peer_cache is not None:
+            self.peer_cache.linger(CONFIG['lan_peers']['linger'])
+            self.peer_cache.stop()
+            self.save_trace()  # Дописываем интервалы раздачи
+
         self.logger.info("=== Prelauncher Finished ===")
 
 
 if __name__ == "__main__":
+    if "--mirror-stats" in sys.argv:
+        # Отчёт для поддержки: почему загрузка шла медленно и в каком порядке пойдут зеркала
+        SystemUtils.save_report(MirrorStats(logging.getLogger("Prelauncher"), APP_DIR / 'mirror_stats.json').report(),
+                                APP_DIR / 'mirror_stats.txt')
+        sys.exit()
+    if "--launch-stats" in sys.argv:
+        # Сравнение времени запуска и падений лаунчера на разных JRE
+        SystemUtils.save_report(LaunchSupervisor(logging.getLogger("Prelauncher"), APP_DIR / 'launch_metrics.json').report(),
+                                APP_DIR / 'launch_stats.txt')
+        sys.exit()
+
     app = PrelauncherApp()
     app.run()
\ No newline at end of file
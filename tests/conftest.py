@@ -0,0 +1,95 @@
+import sys
+import socket
+import logging
+import threading
+import http.server
+import socketserver
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+
+@pytest.fixture
+def logger():
+    return logging.getLogger("PrelauncherTest")
+
+
+@pytest.fixture
+def free_udp_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("", 0))
+        return sock.getsockname()[1]
+
+
+class MirrorHandler(http.server.BaseHTTPRequestHandler):
+    """Отдаёт server.payload; Range поддерживается, только если server.ranges."""
+
+    server: "MirrorServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def _respond(self, send_body: bool):
+        srv = self.server
+        range_header = self.headers.get("Range")
+        srv.requests.append((self.command, range_header))
+        body, status = srv.payload, 200
+        if srv.ranges and range_header and send_body:
+            first, _, last = range_header[len("bytes="):].partition("-")
+            start = int(first)
+            end = min(int(last) if last else len(body) - 1, len(body) - 1)
+            body, status = body[start:end + 1], 206
+
+        self.send_response(status)
+        if srv.advertise_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # Клиент закрыл поток, не дочитав тело
+
+
+class MirrorServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, payload: bytes, ranges: bool, advertise_ranges: bool):
+        super().__init__(("127.0.0.1", 0), MirrorHandler)
+        self.payload = payload
+        self.ranges = ranges
+        self.advertise_ranges = advertise_ranges
+        self.requests = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/java.zip"
+
+    def range_requests(self):
+        return [header for command, header in self.requests if command == "GET" and header]
+
+
+@pytest.fixture
+def mirror_server():
+    """Фабрика локальных HTTP-зеркал: mirror_server(payload, ranges=True, advertise_ranges=None)."""
+    servers = []
+
+    def start(payload: bytes, ranges: bool = True, advertise_ranges=None) -> MirrorServer:
+        server = MirrorServer(payload, ranges, ranges if advertise_ranges is None else advertise_ranges)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,124 @@
+import os
+import hashlib
+import threading
+
+import pytest
+
+import prelauncher
+
+CHUNK = 64 * 1024
+DATA = os.urandom(CHUNK * 4 + 1000)  # Пять блоков, последний неполный
+
+
+def mirror_entry(url, data):
+    return {"url": url, "sha256": hashlib.sha256(data).hexdigest(), "chunk_size": CHUNK,
+            "chunks": [hashlib.sha256(data[i:i + CHUNK]).hexdigest() for i in range(0, len(data), CHUNK)]}
+
+
+def corrupt(data, *blocks):
+    damaged = bytearray(data)
+    for index in blocks:
+        damaged[index * CHUNK + 10] ^= 0xFF
+    return bytes(damaged)
+
+
+def block_range(index):
+    return f"bytes={index * CHUNK}-{(index + 1) * CHUNK - 1}"
+
+
+@pytest.fixture
+def manager(tmp_path, logger, monkeypatch):
+    monkeypatch.setitem(prelauncher.CONFIG, 'max_retries', 1)
+    monkeypatch.setitem(prelauncher.CONFIG['java'], 'install_path', tmp_path / "jre")
+    temp_dir = tmp_path / "temp"
+    temp_dir.mkdir()
+    return prelauncher.JavaManager(logger, temp_dir)
+
+
+def use_mirrors(monkeypatch, data, *servers):
+    monkeypatch.setitem(prelauncher.CONFIG['java'], 'mirrors', [mirror_entry(s.url, data) for s in servers])
+
+
+def download(manager):
+    return manager.download_java(lambda progress: None, threading.Event())
+
+
+def test_feed_flags_corrupted_and_missing_blocks():
+    verifier = prelauncher.ChunkVerifier(mirror_entry("", DATA))
+    received = corrupt(DATA, 1)[:CHUNK * 3 + 10]  # Поток оборвался посреди блока 3
+    for start in range(0, len(received), 1000):   # Куски не совпадают с границами блоков
+        verifier.feed(received[start:start + 1000])
+    assert verifier.finish() == [1, 3, 4]
+    assert verifier.size is None
+
+
+def test_feed_intact_stream_sets_size():
+    verifier = prelauncher.ChunkVerifier(mirror_entry("", DATA))
+    verifier.feed(DATA)
+    assert verifier.finish() == []
+    assert verifier.size == len(DATA)
+
+
+def test_resume_truncated_archive(manager, mirror_server, monkeypatch):
+    server = mirror_server(DATA)
+    use_mirrors(monkeypatch, DATA, server)
+    temp_zip = manager.temp_dir / "java.zip"
+    temp_zip.write_bytes(DATA[:CHUNK * 3 + 500])
+    assert prelauncher.ChunkVerifier(mirror_entry(server.url, DATA)).scan(temp_zip) == [3, 4]
+
+    assert download(manager)
+    assert temp_zip.read_bytes() == DATA
+    # Докачаны только недостающие блоки, без полной загрузки
+    assert server.requests == [("GET", block_range(3)), ("GET", block_range(4))]
+
+
+def test_repair_skips_source_without_range(manager, mirror_server, monkeypatch):
+    broken = mirror_server(corrupt(DATA, 1, 3), ranges=False)
+    good = mirror_server(DATA)
+    use_mirrors(monkeypatch, DATA, broken, good)
+
+    assert download(manager)
+    assert (manager.temp_dir / "java.zip").read_bytes() == DATA
+    # После ответа 200 источник больше не опрашивается
+    assert broken.range_requests() == [block_range(1)]
+    assert good.requests == [("GET", block_range(1)), ("GET", block_range(3))]
+
+
+def test_repair_takes_block_from_second_source(manager, mirror_server, monkeypatch):
+    broken = mirror_server(corrupt(DATA, 2))
+    good = mirror_server(DATA)
+    use_mirrors(monkeypatch, DATA, broken, good)
+
+    assert download(manager)
+    assert (manager.temp_dir / "java.zip").read_bytes() == DATA
+    assert broken.range_requests() == [block_range(2)]
+    assert good.requests == [("GET", block_range(2))]
+
+
+def test_trailing_data_after_intact_blocks_is_trimmed(manager, mirror_server, monkeypatch):
+    data = DATA[:CHUNK * 4]  # Архив ровно из целых блоков: все блоки сходятся, лишнее только в хвосте
+    server = mirror_server(data + b"trailing junk")
+    use_mirrors(monkeypatch, data, server)
+
+    assert download(manager)
+    assert (manager.temp_dir / "java.zip").read_bytes() == data
+    assert server.range_requests() == []
+
+
+def test_trailing_data_in_last_block_is_repaired_and_trimmed(manager, mirror_server, monkeypatch):
+    padded = mirror_server(DATA + b"trailing junk")
+    good = mirror_server(DATA)
+    use_mirrors(monkeypatch, DATA, padded, good)
+
+    assert download(manager)
+    assert (manager.temp_dir / "java.zip").read_bytes() == DATA
+    assert good.requests == [("GET", block_range(4))]
+
+
+def test_repair_fails_when_no_source_has_block(manager, mirror_server, monkeypatch):
+    server = mirror_server(corrupt(DATA, 0), ranges=False)
+    use_mirrors(monkeypatch, DATA, server)
+
+    assert not download(manager)
+    assert not (manager.temp_dir / "java.zip").exists()
+    assert server.range_requests() == [block_range(0)]
@@ -0,0 +1,129 @@
+import io
+import os
+import zipfile
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+
+import prelauncher
+
+MARGIN = 10
+
+
+@pytest.fixture
+def manager(tmp_path, logger, monkeypatch):
+    # Обе папки на одном томе (tmp_path); папки установки ещё нет
+    monkeypatch.setitem(prelauncher.CONFIG['java'], 'install_path', tmp_path / "ProgramFiles" / "Java" / "jre")
+    monkeypatch.setitem(prelauncher.CONFIG['java'], 'space_margin', MARGIN)
+    temp_dir = tmp_path / "temp"
+    temp_dir.mkdir()
+    return prelauncher.JavaManager(logger, temp_dir)
+
+
+@pytest.fixture
+def free_space(monkeypatch):
+    def set_free(free):
+        monkeypatch.setattr(prelauncher.shutil, "disk_usage", lambda path: SimpleNamespace(free=free))
+    return set_free
+
+
+@pytest.fixture
+def jre_zip():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("jre/bin/javaw.exe", b"MZ" * 5000)
+        zf.writestr("jre/lib/rt.jar", os.urandom(100 * 1024))
+    return buffer.getvalue(), 10000 + 100 * 1024
+
+
+def test_same_volume_requirements_are_summed(manager, free_space):
+    free_space(100 + 200 + MARGIN)
+    assert manager.check_disk_space(archive_size=100, unpacked_size=200) is None
+
+    free_space(100 + 200 + MARGIN - 1)
+    shortage = manager.check_disk_space(archive_size=100, unpacked_size=200)
+    assert shortage == {"path": manager.temp_dir.anchor, "needed": 310, "free": 309}
+    assert manager.space_shortage == shortage
+
+
+def test_partial_download_counts_only_remaining_bytes(manager, free_space):
+    (manager.temp_dir / "java.zip").write_bytes(b"x" * 40)
+    free_space(60 + MARGIN)
+    assert manager.check_disk_space(archive_size=100) is None
+    free_space(60 + MARGIN - 1)
+    assert manager.check_disk_space(archive_size=100)['needed'] == 70
+
+
+def test_sizes_from_mirror_entry(manager, monkeypatch):
+    monkeypatch.setitem(prelauncher.CONFIG['java'], 'mirrors', [
+        {"url": "http://127.0.0.1:9/java.zip", "sha256": "0" * 64, "size": 45, "unpacked_size": 120}])
+    assert manager.probe_archive_sizes() == (45, 120)
+
+
+def test_sizes_from_remote_central_directory(manager, mirror_server, jre_zip, monkeypatch):
+    payload, unpacked = jre_zip
+    server = mirror_server(payload)
+    monkeypatch.setitem(prelauncher.CONFIG['java'], 'mirrors', [
+        {"url": server.url, "sha256": hashlib.sha256(payload).hexdigest()}])
+
+    assert manager.probe_archive_sizes() == (len(payload), unpacked)
+    # Только HEAD и Range-запросы к хвосту архива, без полной загрузки
+    assert server.requests[0] == ("HEAD", None)
+    assert all(header for command, header in server.requests[1:])
+
+
+@pytest.mark.parametrize("ranges, advertise_ranges", [
+    (False, True),   # Заявляет Range в HEAD, но отвечает 200 на GET
+    (True, False),   # Нет Accept-Ranges в HEAD
+])
+def test_falls_back_when_ranges_unavailable(manager, mirror_server, jre_zip, monkeypatch, ranges, advertise_ranges):
+    payload, unpacked = jre_zip
+    broken = mirror_server(payload, ranges=ranges, advertise_ranges=advertise_ranges)
+    good = mirror_server(payload)
+    sha = hashlib.sha256(payload).hexdigest()
+    monkeypatch.setitem(prelauncher.CONFIG['java'], 'mirrors', [
+        {"url": broken.url, "sha256": sha}, {"url": good.url, "sha256": sha}])
+
+    assert manager.probe_archive_sizes() == (len(payload), unpacked)
+    assert len([command for command, _ in broken.requests if command == "GET"]) <= 1
+
+
+def test_range_file_requires_accept_ranges(mirror_server):
+    server = mirror_server(b"data", advertise_ranges=False)
+    with pytest.raises(OSError):
+        prelauncher.HTTPRangeFile(server.url, timeout=5)
+    assert server.requests == [("HEAD", None)]
+
+
+def test_range_file_rejects_full_response(mirror_server):
+    remote = prelauncher.HTTPRangeFile(mirror_server(b"0123456789" * 100, ranges=False, advertise_ranges=True).url,
+                                       timeout=5)
+    assert remote.size == 1000
+    with pytest.raises(OSError):
+        remote.read(10)
+    assert remote.tell() == 0
+
+
+def test_range_file_reads_and_seeks(mirror_server):
+    remote = prelauncher.HTTPRangeFile(mirror_server(b"0123456789" * 100).url, timeout=5)
+    remote.seek(-4, os.SEEK_END)
+    assert remote.read() == b"6789"
+    remote.seek(15)
+    assert remote.read(3) == b"567"
+    assert remote.tell() == 18
+
+
+def test_preflight_skips_unknown_size(manager, monkeypatch):
+    monkeypatch.setitem(prelauncher.CONFIG['java'], 'mirrors', [{"url": "http://127.0.0.1:9/java.zip", "sha256": "0" * 64}])
+    assert manager.preflight() is None
+
+
+@pytest.mark.parametrize("fallocate", [True, False])
+def test_preallocate(tmp_path, monkeypatch, fallocate):
+    if not fallocate:
+        monkeypatch.delattr(prelauncher.os, "posix_fallocate", raising=False)
+    path = tmp_path / "file.bin"
+    with open(path, "wb") as f:
+        prelauncher.SystemUtils.preallocate(f, 1024 * 1024)
+    assert path.stat().st_size == 1024 * 1024
@@ -0,0 +1,98 @@
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import prelauncher
+
+CRASH = "#!/bin/sh\necho 'Error: could not create the Java Virtual Machine.'\nexit 1\n"
+READY = "#!/bin/sh\necho 'Launcher READY'\nsleep 1\n"
+
+
+@pytest.fixture
+def fake_java(tmp_path):
+    def make(name, script):
+        javaw = tmp_path / name / "bin" / "javaw.exe"
+        javaw.parent.mkdir(parents=True)
+        javaw.write_text(script)
+        javaw.chmod(0o755)
+        return javaw
+    return make
+
+
+@pytest.fixture
+def launcher_jar(tmp_path):
+    jar = tmp_path / "launcher" / prelauncher.LAUNCHER_JAR
+    jar.parent.mkdir()
+    jar.write_bytes(b"PK")
+    return jar
+
+
+@pytest.fixture
+def app(tmp_path, logger, monkeypatch):
+    monkeypatch.setitem(prelauncher.CONFIG['launch'], 'ready_marker', r"READY")
+    monkeypatch.setitem(prelauncher.CONFIG['launch'], 'ready_timeout', 10)
+    monkeypatch.setitem(prelauncher.CONFIG['java'], 'install_path', tmp_path / "bundled")
+    stopped = []
+    monkeypatch.setattr(prelauncher.dpg, "stop_dearpygui", lambda: stopped.append(True))
+    monkeypatch.setattr(prelauncher.dpg, "is_dearpygui_running", lambda: False)  # Без контекста dpg падает
+
+    # Конструктор приложения требует прав администратора и UI — он здесь не нужен
+    app = prelauncher.PrelauncherApp.__new__(prelauncher.PrelauncherApp)
+    app.logger = logger
+    app.log_text = ""
+    app.cancel_event = threading.Event()
+    app.launch_supervisor = prelauncher.LaunchSupervisor(logger, tmp_path / "launch_metrics.json")
+    app.java_manager = SimpleNamespace(find_existing_javas=lambda: [])
+    app.stopped = stopped
+    return app
+
+
+def launched(app):
+    metrics = json.loads(app.launch_supervisor.metrics_file.read_text(encoding="utf-8"))
+    return [(metric['java'], metric['outcome']) for metric in metrics]
+
+
+def test_ready_marker_in_output(app, fake_java, launcher_jar):
+    java = fake_java("jre", READY)
+    metric = app.launch_supervisor.launch(java, launcher_jar, threading.Event())
+    assert metric['outcome'] == "ready"
+    assert metric['ready_via'] == "marker"
+
+
+def test_falls_back_to_next_java_then_bundled(app, fake_java, launcher_jar):
+    first = fake_java("first", CRASH)
+    second = fake_java("second", CRASH)
+    bundled = fake_java("bundled", READY)
+    # Упавшая Java снова попадается среди найденных — повторно её не запускаем
+    app.java_manager.find_existing_javas = lambda: [first, second]
+
+    app.launch_game(first, launcher_jar)
+    assert launched(app) == [(str(first), "crashed"), (str(second), "crashed"), (str(bundled), "ready")]
+    assert app.stopped == [True]
+
+
+def test_every_java_crashes(app, fake_java, launcher_jar):
+    first = fake_java("first", CRASH)
+    bundled = fake_java("bundled", CRASH)
+    app.java_manager.find_existing_javas = lambda: [bundled]  # Наша JRE найдена и поиском
+
+    app.launch_game(first, launcher_jar)
+    assert launched(app) == [(str(first), "crashed"), (str(bundled), "crashed")]
+    assert app.stopped == []
+    assert "failed to start with every available Java" in app.log_text
+
+
+def test_failed_start_is_recorded(app, fake_java, launcher_jar, tmp_path):
+    missing = tmp_path / "missing" / "bin" / "javaw.exe"
+    ready = fake_java("jre", READY)
+    app.java_manager.find_existing_javas = lambda: [ready]
+
+    app.launch_game(missing, launcher_jar)
+    metrics = json.loads(app.launch_supervisor.metrics_file.read_text(encoding="utf-8"))
+    assert metrics[0]['java'] == str(missing)
+    assert metrics[0]['outcome'] == "crashed"
+    assert metrics[0]['error']
+    assert launched(app)[1] == (str(ready), "ready")
+    assert "crashed 1" in app.launch_supervisor.report()
@@ -0,0 +1,45 @@
+import pytest
+
+import prelauncher
+
+SHA = "a" * 64
+
+
+@pytest.fixture
+def manager(tmp_path, logger, monkeypatch):
+    monkeypatch.setitem(prelauncher.CONFIG['java'], 'mirrors', [{"url": "https://builtin/java.zip", "sha256": SHA}])
+    return prelauncher.JavaManager(logger, tmp_path)
+
+
+@pytest.mark.parametrize("extra", [
+    {"size": "45MB"},
+    {"size": 0},
+    {"unpacked_size": True},
+    {"chunks": "zz"},
+    {"chunks": []},
+    {"chunks": ["b" * 63]},
+    {"chunks": [SHA], "chunk_size": -1},
+])
+def test_invalid_mirror_fields_are_dropped(manager, extra):
+    manifest = {"java": {"mirrors": [{"url": "https://bad/java.zip", "sha256": SHA, **extra},
+                                     {"url": "https://good/java.zip", "sha256": SHA, "size": 100}]}}
+    assert manager.apply_manifest(manifest)
+    assert [m['url'] for m in prelauncher.CONFIG['java']['mirrors']] == ["https://good/java.zip"]
+
+
+@pytest.mark.parametrize("manifest", [
+    {"java": {"mirrors": 5}},
+    {"java": {"mirrors": [{"url": "https://bad/java.zip", "sha256": "zz"}]}},
+    {"java": "1.8"},
+    {},
+])
+def test_malformed_manifest_keeps_builtin_config(manager, manifest):
+    assert not manager.apply_manifest(manifest)
+    assert prelauncher.CONFIG['java']['mirrors'] == [{"url": "https://builtin/java.zip", "sha256": SHA}]
+
+
+def test_valid_chunked_mirror_is_accepted(manager):
+    mirror = {"url": "https://cdn/java.zip", "sha256": SHA, "size": 10, "unpacked_size": 20,
+              "chunk_size": 4, "chunks": [SHA, SHA.upper()]}
+    assert manager.apply_manifest({"java": {"version": "1.8.0_", "mirrors": [mirror]}})
+    assert prelauncher.CONFIG['java']['mirrors'] == [mirror]
@@ -0,0 +1,77 @@
+import pytest
+
+import prelauncher
+
+NOW = 1_700_000_000.0
+HALF_LIFE = prelauncher.CONFIG['mirror_stats']['half_life']
+EXPECTED_SIZE = prelauncher.CONFIG['mirror_stats']['expected_size']
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    current = [NOW]
+    monkeypatch.setattr(prelauncher.time, "time", lambda: current[0])
+    return current
+
+
+@pytest.fixture
+def stats(tmp_path, logger, clock):
+    return prelauncher.MirrorStats(logger, tmp_path / "mirror_stats.json")
+
+
+def mirrors(*names):
+    return [{"url": f"https://{name}/java.zip", "sha256": "0" * 64} for name in names]
+
+
+def test_counters_decay_by_half_life(stats, clock):
+    stats.record("https://a/java.zip", failure=True)
+    stats.record("https://a/java.zip", mismatch=True)
+    clock[0] += HALF_LIFE
+    entry = stats._decayed("https://a/java.zip")
+    assert entry['failures'] == pytest.approx(0.5)
+    assert entry['mismatches'] == pytest.approx(0.5)
+    assert entry['successes'] == 0
+
+
+def test_score(stats):
+    assert stats.score("https://unknown/java.zip") == 60.0
+    stats.record("https://a/java.zip", ttfb=0.5, throughput=EXPECTED_SIZE / 10)
+    assert stats.score("https://a/java.zip") == pytest.approx(10.5)
+    stats.record("https://a/java.zip", failure=True)
+    # Одна неудача из двух попыток: доля 1/3, штраф x(1 + 4/3)
+    assert stats.score("https://a/java.zip") == pytest.approx(10.5 * (1 + 4 / 3))
+
+
+def test_order_keeps_config_order_for_unknown_mirrors(stats):
+    assert stats.order(mirrors("a", "b", "c")) == mirrors("a", "b", "c")
+
+    stats.record("https://c/java.zip", ttfb=0.1, throughput=EXPECTED_SIZE / 5)
+    stats.record("https://a/java.zip", mismatch=True)
+    # Быстрое зеркало — первым, зеркало с битым архивом — за неизвестными
+    assert stats.order(mirrors("a", "b", "c", "d")) == mirrors("c", "b", "d", "a")
+
+
+def test_mismatch_penalty_fades(stats, clock):
+    stats.record("https://a/java.zip", mismatch=True)
+    assert stats.order(mirrors("a", "b")) == mirrors("b", "a")
+    assert stats.score("https://a/java.zip") == pytest.approx(60 * (1 + 4 / 2) + 120)
+    clock[0] += HALF_LIFE
+    # Несовпадение весит 0.5: доля неудач 0.5 / 1.5, штраф 120 * 0.5
+    assert stats.score("https://a/java.zip") == pytest.approx(60 * (1 + 4 / 3) + 60)
+    clock[0] += 20 * HALF_LIFE
+    assert stats.score("https://a/java.zip") == pytest.approx(60.0, abs=0.01)
+
+
+def test_tuning(stats):
+    assert stats.tuning("https://unknown/java.zip") == (stats.DEFAULT_CHUNK_SIZE, stats.DEFAULT_TIMEOUT)
+    stats.record("https://a/java.zip", ttfb=1.0, throughput=1024 * 1024)
+    assert stats.tuning("https://a/java.zip") == (256 * 1024, 10)
+    stats.record("https://fast/java.zip", ttfb=0.01, throughput=1024 ** 3)
+    assert stats.tuning("https://fast/java.zip") == (4 * 1024 * 1024, 5)
+
+
+def test_saved_and_reloaded(stats, logger):
+    stats.record("https://a/java.zip", ttfb=0.2, throughput=EXPECTED_SIZE / 10)
+    stats.save()
+    reloaded = prelauncher.MirrorStats(logger, stats.stats_file)
+    assert reloaded.score("https://a/java.zip") == pytest.approx(stats.score("https://a/java.zip"))
@@ -0,0 +1,108 @@
+import os
+import hashlib
+import threading
+
+import pytest
+import requests
+
+import prelauncher
+
+
+@pytest.fixture
+def archive(tmp_path):
+    data = os.urandom(256 * 1024)
+    path = tmp_path / "source.zip"
+    path.write_bytes(data)
+    return path, data, hashlib.sha256(data).hexdigest()
+
+
+@pytest.fixture
+def peer(tmp_path, logger, free_udp_port, monkeypatch, archive):
+    monkeypatch.setitem(prelauncher.CONFIG['lan_peers'], 'port', free_udp_port)
+    path, _, sha = archive
+    cache = prelauncher.PeerCache(logger, tmp_path / "peer_cache")
+    cache.publish(path, sha)
+    yield cache
+    cache.stop()
+
+
+def archive_url(peer, sha):
+    return f"http://127.0.0.1:{peer._http.server_address[1]}/{peer.archive_path(sha).name}"
+
+
+def test_serves_whole_archive(peer, archive):
+    _, data, sha = archive
+    r = requests.get(archive_url(peer, sha))
+    assert r.status_code == 200
+    assert r.headers['Accept-Ranges'] == "bytes"
+    assert r.content == data
+
+
+@pytest.mark.parametrize("header, start, end", [
+    ("bytes=10-19", 10, 19),
+    ("bytes=1000-", 1000, None),     # Открытый диапазон до конца файла
+    ("bytes=-5", -5, None),          # Суффикс: последние 5 байт
+    ("bytes=100-999999999", 100, None),  # Конец за пределами файла обрезается
+])
+def test_range_requests(peer, archive, header, start, end):
+    _, data, sha = archive
+    expected = data[start:end + 1 if end is not None else None]
+    r = requests.get(archive_url(peer, sha), headers={"Range": header})
+    assert r.status_code == 206
+    assert r.content == expected
+    first = start if start >= 0 else len(data) + start
+    assert r.headers['Content-Range'] == f"bytes {first}-{first + len(expected) - 1}/{len(data)}"
+
+
+@pytest.mark.parametrize("header", ["bytes=262144-", "bytes=500-100"])
+def test_unsatisfiable_range(peer, archive, header):
+    _, data, sha = archive
+    r = requests.get(archive_url(peer, sha), headers={"Range": header})
+    assert r.status_code == 416
+    assert r.headers['Content-Range'] == f"bytes */{len(data)}"
+
+
+def test_unknown_path_is_not_served(peer):
+    r = requests.get(f"http://127.0.0.1:{peer._http.server_address[1]}/../launcher_config.json")
+    assert r.status_code == 404
+
+
+def test_discover_finds_local_peer_once(tmp_path, logger, peer, archive):
+    _, _, sha = archive
+    client = prelauncher.PeerCache(logger, tmp_path / "client_cache")
+    found = client.discover([sha, "0" * 64])
+    assert found == [{"url": archive_url(peer, sha), "sha256": sha, "peer": True}]
+
+
+def test_download_from_peer_before_mirrors(tmp_path, logger, peer, archive, monkeypatch):
+    _, data, sha = archive
+    monkeypatch.setitem(prelauncher.CONFIG['java'], 'mirrors', [{"url": "http://127.0.0.1:9/java.zip", "sha256": sha}])
+    monkeypatch.setitem(prelauncher.CONFIG, 'max_retries', 1)
+    temp_dir = tmp_path / "tmp"
+    temp_dir.mkdir()
+
+    manager = prelauncher.JavaManager(logger, temp_dir, peers=prelauncher.PeerCache(logger, tmp_path / "client_cache"))
+    assert manager.download_java(lambda progress: None, threading.Event())
+    assert manager.downloaded_sha == sha
+    assert (temp_dir / "java.zip").read_bytes() == data
+
+
+def test_untrusted_peer_archive_is_rejected(tmp_path, logger, free_udp_port, monkeypatch):
+    monkeypatch.setitem(prelauncher.CONFIG['lan_peers'], 'port', free_udp_port)
+    pinned_sha = hashlib.sha256(b"real archive").hexdigest()
+    forged = tmp_path / "forged.zip"
+    forged.write_bytes(b"forged archive")
+
+    liar = prelauncher.PeerCache(logger, tmp_path / "liar_cache")
+    liar.publish(forged, pinned_sha)  # Сосед утверждает, что у него закреплённый архив
+    try:
+        monkeypatch.setitem(prelauncher.CONFIG['java'], 'mirrors', [{"url": "http://127.0.0.1:9/java.zip", "sha256": pinned_sha}])
+        monkeypatch.setitem(prelauncher.CONFIG, 'max_retries', 1)
+        temp_dir = tmp_path / "tmp"
+        temp_dir.mkdir()
+
+        manager = prelauncher.JavaManager(logger, temp_dir, peers=prelauncher.PeerCache(logger, tmp_path / "client_cache"))
+        assert not manager.download_java(lambda progress: None, threading.Event())
+        assert not (temp_dir / "java.zip").exists()
+    finally:
+        liar.stop()
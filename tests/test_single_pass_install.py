@@ -0,0 +1,103 @@
+import io
+import hashlib
+import zipfile
+import threading
+
+import pytest
+
+import prelauncher
+
+JAVA_FILES = {"zulu8-jre/bin/javaw.exe": b"MZ" + b"\x00" * 4096, "zulu8-jre/lib/rt.jar": b"rt" * 10000}
+
+
+def make_zip(entries, compression=zipfile.ZIP_DEFLATED) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression) as zf:
+        for name, data in entries.items():
+            zf.writestr(name, data)
+    return buffer.getvalue()
+
+
+class NonSeekable(io.RawIOBase):
+    """Поток без seek: zipfile пишет записи с дескриптором данных (флаг 0x08)."""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+
+@pytest.fixture
+def manager(tmp_path, logger, monkeypatch):
+    monkeypatch.setitem(prelauncher.CONFIG['java'], 'install_path', tmp_path / "runtime" / "jre")
+    monkeypatch.setitem(prelauncher.CONFIG['java'], 'space_margin', 0)
+    temp_dir = tmp_path / "temp"
+    temp_dir.mkdir()
+    return prelauncher.JavaManager(logger, temp_dir)
+
+
+def install(manager, data: bytes, expected_sha=None) -> bool:
+    (manager.temp_dir / "java.zip").write_bytes(data)
+    return manager.install_java(threading.Event(), expected_sha or hashlib.sha256(data).hexdigest())
+
+
+def staging_of(path):
+    return path.with_name(path.name + ".staging")
+
+
+def test_installs_and_flattens_nested_dir(manager):
+    assert install(manager, make_zip(JAVA_FILES))
+    install_path = prelauncher.CONFIG['java']['install_path']
+    assert (install_path / "bin" / "javaw.exe").read_bytes() == JAVA_FILES["zulu8-jre/bin/javaw.exe"]
+    assert (install_path / "lib" / "rt.jar").read_bytes() == JAVA_FILES["zulu8-jre/lib/rt.jar"]
+    assert not staging_of(install_path).exists()
+
+
+def test_data_descriptor_entries(manager):
+    stream = NonSeekable()
+    with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in JAVA_FILES.items():
+            zf.writestr(name, data)
+    data = stream.buffer.getvalue()
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert all(info.flag_bits & 0x08 for info in zf.infolist())
+
+    assert install(manager, data)
+    assert (prelauncher.CONFIG['java']['install_path'] / "lib" / "rt.jar").read_bytes() == JAVA_FILES["zulu8-jre/lib/rt.jar"]
+
+
+def test_rejects_path_traversal(manager, caplog):
+    assert not install(manager, make_zip({**JAVA_FILES, "../evil.txt": b"owned"}))
+    assert "Unsafe path in archive: ../evil.txt" in caplog.text
+    install_path = prelauncher.CONFIG['java']['install_path']
+    assert not (install_path.parent / "evil.txt").exists()
+    assert not install_path.exists()
+    assert not staging_of(install_path).exists()
+
+
+def test_rejects_crc_mismatch(manager, caplog):
+    data = bytearray(make_zip(JAVA_FILES, zipfile.ZIP_STORED))
+    offset = data.index(b"rtrtrt") + 100
+    data[offset] ^= 0xFF  # Хеш всего файла совпадёт, а CRC записи — нет
+    assert not install(manager, bytes(data))
+    assert "CRC check failed for zulu8-jre/lib/rt.jar" in caplog.text
+    install_path = prelauncher.CONFIG['java']['install_path']
+    assert not install_path.exists()
+    assert not staging_of(install_path).exists()
+
+
+def test_wrong_digest_keeps_existing_install(manager, caplog):
+    install_path = prelauncher.CONFIG['java']['install_path']
+    (install_path / "bin").mkdir(parents=True)
+    (install_path / "bin" / "javaw.exe").write_bytes(b"old")
+
+    assert not install(manager, make_zip(JAVA_FILES), expected_sha="0" * 64)
+    assert "Archive checksum mismatch" in caplog.text
+    assert (install_path / "bin" / "javaw.exe").read_bytes() == b"old"
+    assert not (install_path / "lib").exists()
+    assert not staging_of(install_path).exists()
+    assert not install_path.with_name(install_path.name + ".old").exists()
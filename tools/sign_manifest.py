@@ -0,0 +1,68 @@
+"""Подпись манифеста артефактов для CONFIG['manifest'] прелаунчера.
+
+Пример:
+    python tools/sign_manifest.py genkey manifest_key.pem
+    python tools/sign_manifest.py sign manifest_key.pem payload.json manifest.json
+    python tools/sign_manifest.py chunks zulu-jre.zip [chunk_mb]
+
+genkey печатает публичный ключ (hex) для CONFIG['manifest']['public_key'].
+Приватный ключ не должен попадать в репозиторий.
+chunks печатает поля "size", "sha256", "chunk_size" и "chunks" для записи зеркала.
+"""
+import sys
+import base64
+import hashlib
+import json
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+
+def public_key_hex(private_key: Ed25519PrivateKey) -> str:
+    return private_key.public_key().public_bytes(
+        serialization.Encoding.Raw, serialization.PublicFormat.Raw
+    ).hex()
+
+
+def genkey(key_file: Path):
+    private_key = Ed25519PrivateKey.generate()
+    key_file.write_bytes(private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ))
+    print(f"Public key: {public_key_hex(private_key)}")
+
+
+def sign(key_file: Path, payload_file: Path, output_file: Path):
+    private_key = serialization.load_pem_private_key(key_file.read_bytes(), password=None)
+    # Проверяем, что payload — валидный JSON, и подписываем его компактное представление
+    payload = json.dumps(json.loads(payload_file.read_text(encoding="utf-8")),
+                         ensure_ascii=False, separators=(",", ":"))
+    signature = base64.b64encode(private_key.sign(payload.encode("utf-8"))).decode("ascii")
+    output_file.write_text(json.dumps({"payload": payload, "signature": signature}, ensure_ascii=False),
+                           encoding="utf-8")
+    print(f"Signed manifest written to {output_file} (public key {public_key_hex(private_key)})")
+
+
+def chunks(archive: Path, chunk_mb: int = 4):
+    chunk_size = chunk_mb * 1024 * 1024
+    whole = hashlib.sha256()
+    hashes = []
+    with open(archive, "rb") as f:
+        while block := f.read(chunk_size):
+            whole.update(block)
+            hashes.append(hashlib.sha256(block).hexdigest())
+    print(json.dumps({"size": archive.stat().st_size, "sha256": whole.hexdigest(),
+                      "chunk_size": chunk_size, "chunks": hashes}, indent=4))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "genkey":
+        genkey(Path(sys.argv[2]))
+    elif len(sys.argv) == 5 and sys.argv[1] == "sign":
+        sign(Path(sys.argv[2]), Path(sys.argv[3]), Path(sys.argv[4]))
+    elif len(sys.argv) in (3, 4) and sys.argv[1] == "chunks":
+        chunks(Path(sys.argv[2]), *(int(arg) for arg in sys.argv[3:]))
+    else:
+        print(__doc__)
+        sys.exit(1)